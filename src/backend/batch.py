@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from queries import register, read
+
+# Максимальное число элементов в одном пакетном запросе
+MAX_BATCH_SIZE = 200
+
+
+class BatchRequest(BaseModel):
+    names: list[str] = Field(default=[], max_length=MAX_BATCH_SIZE)
+    ids: list[str] = Field(default=[], max_length=MAX_BATCH_SIZE)
+
+
+# Один запрос на весь пакет: сначала поиск по именам, затем по id.
+# body продолжает запрос после OPTIONAL MATCH узла n и должен вернуть key и found
+BATCH_QUERY = register("batch.run_batch", """
+    UNWIND $names AS key
+    OPTIONAL MATCH (n:{label} {{name: key}})
+    {body}
+    UNION ALL
+    UNWIND $ids AS key
+    OPTIONAL MATCH (n:{label} {{id: key}})
+    {body}
+    """)
+
+
+async def run_batch(driver, label, body, request, format_record):
+    """Ответ вида {"items": {ключ: карточка или null}, "not_found": [ключи]}."""
+    names = list(dict.fromkeys(request.names))
+    ids = list(dict.fromkeys(request.ids))
+    items = {}
+    not_found = []
+    records = await read(driver, BATCH_QUERY, {"names": names, "ids": ids}, label=label, body=body)
+    for record in records:
+        if record["found"]:
+            items[record["key"]] = format_record(record)
+        else:
+            items[record["key"]] = None
+            not_found.append(record["key"])
+    return {"items": items, "not_found": not_found}
@@ -0,0 +1,56 @@
+"""Сравнение двух прогонов benchmark.run.
+
+Завершается с кодом 1, если в каком-либо сценарии p95 вырос или пропускная способность
+упала больше чем на --threshold (доля).
+
+    python -m benchmark.compare benchmark/results/base.json benchmark/results/new.json --threshold 0.15
+"""
+import argparse
+import json
+import sys
+
+
+def change(old, new):
+    if not old or new is None:
+        return None
+    return (new - old) / old
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    print(f"baseline  {baseline.get('commit')}\ncandidate {candidate.get('commit')}\n")
+    print(f"{'scenario':35} {'p95 ms':>21} {'change':>8} {'rps':>21} {'change':>8}")
+
+    regressions = []
+    for name, old in baseline["scenarios"].items():
+        new = candidate["scenarios"].get(name)
+        if new is None:
+            continue
+        p95_change = change(old["p95_ms"], new["p95_ms"])
+        rps_change = change(old["throughput_rps"], new["throughput_rps"])
+        regressed = ((p95_change is not None and p95_change > args.threshold)
+                     or (rps_change is not None and rps_change < -args.threshold))
+        if regressed:
+            regressions.append(name)
+        format_change = lambda value: f"{value:+.1%}" if value is not None else "-"
+        print(f"{name:35} {old['p95_ms']:>10} -> {new['p95_ms']:<7} {format_change(p95_change):>8} "
+              f"{old['throughput_rps']:>10} -> {new['throughput_rps']:<7} {format_change(rps_change):>8}"
+              f"{'  REGRESSION' if regressed else ''}")
+
+    if regressions:
+        print(f"\nRegressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Синтетический каталог для нагрузочных тестов.
+
+Пропорции меток, распределения степеней и словарь имен берутся из db.json; результат
+имеет формат data.json для /api/import.
+
+    python -m benchmark.generate --nodes 100000 --out benchmark/data/catalog_100k.json
+"""
+import argparse
+import json
+import os
+import random
+import uuid
+from collections import Counter, defaultdict
+from itertools import accumulate
+
+SEED_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "db.json")
+
+# Тип связи профессии -> метка цели; группирующие связи -> (метка элемента, метка группы)
+PROFESSION_RELATIONSHIPS = {"REQUIRES": "Skill", "USES_TECH": "Technology", "USES_TOOL": "Tool"}
+GROUP_RELATIONSHIPS = {"GROUPS_SKILL": ("Skill", "SkillGroup"), "GROUPS_TECH": ("Technology", "TechnologyGroup"),
+                       "GROUPS_TOOL": ("Tool", "ToolGroup")}
+
+# Модификаторы, из которых собираются новые уникальные имена на основе имен из db.json
+NAME_MODIFIERS = [
+    "Junior", "Middle", "Senior", "Lead", "Principal", "Cloud", "Enterprise", "Mobile", "Data", "Platform",
+    "Базовый", "Продвинутый", "Корпоративный", "Системный", "Прикладной", "Ведущий", "Старший", "Облачный",
+]
+
+# Чем больше показатель, тем сильнее популярные навыки и инструменты собирают связи
+POPULARITY_EXPONENT = 0.8
+
+
+def load_seed(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    by_id = {node["properties"]["id"]: node for node in data["nodes"]}
+    labels = Counter(node["label"] for node in data["nodes"])
+
+    names = defaultdict(list)
+    descriptions = defaultdict(list)
+    for node in data["nodes"]:
+        names[node["label"]].append(node["properties"]["name"])
+        description = node["properties"].get("description")
+        if description and not description.startswith("_"):
+            descriptions[node["label"]].append(description)
+
+    # Сколько навыков, технологий и инструментов у каждой профессии в db.json
+    degrees = defaultdict(Counter)
+    for relationship in data["relationships"]:
+        if relationship["type"] in PROFESSION_RELATIONSHIPS and relationship["startNode"] in by_id:
+            degrees[relationship["type"]][relationship["startNode"]] += 1
+    return labels, names, descriptions, {rel_type: list(c.values()) for rel_type, c in degrees.items()}
+
+
+def unique_names(rng, base_names, count):
+    names = list(dict.fromkeys(base_names))[:count]
+    seen = set(names)
+    while len(names) < count:
+        name = f"{rng.choice(NAME_MODIFIERS)} {rng.choice(base_names)}"
+        if name in seen:
+            name = f"{name} {len(names)}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def popularity_weights(count):
+    # Накопленные веса: rng.choices с cum_weights не пересчитывает их при каждом вызове
+    return list(accumulate(1 / (rank + 1) ** POPULARITY_EXPONENT for rank in range(count)))
+
+
+def generate(total_nodes, seed=0, seed_file=SEED_FILE):
+    rng = random.Random(seed)
+    labels, names, descriptions, degrees = load_seed(seed_file)
+    seed_total = sum(labels.values())
+
+    nodes = []
+    ids = {}
+    for label, seed_count in labels.items():
+        count = max(1, round(total_nodes * seed_count / seed_total))
+        ids[label] = []
+        for name in unique_names(rng, names[label], count):
+            node_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            properties = {"id": node_id, "name": name}
+            if descriptions[label]:
+                properties["description"] = rng.choice(descriptions[label])
+            nodes.append({"label": label, "properties": properties})
+            ids[label].append(node_id)
+
+    relationships = []
+    weights = {label: popularity_weights(len(ids[label])) for label in ids}
+    for profession in ids["Profession"]:
+        relationships.append({"type": "BELONGS_TO", "startNode": profession,
+                              "endNode": rng.choice(ids["Category"])})
+        for rel_type, target_label in PROFESSION_RELATIONSHIPS.items():
+            targets = ids[target_label]
+            degree = min(rng.choice(degrees.get(rel_type) or [1]), len(targets))
+            chosen = set()
+            while len(chosen) < degree:
+                chosen.update(rng.choices(range(len(targets)), cum_weights=weights[target_label],
+                                          k=degree - len(chosen)))
+            relationships.extend({"type": rel_type, "startNode": profession, "endNode": targets[i]} for i in chosen)
+
+    for rel_type, (item_label, group_label) in GROUP_RELATIONSHIPS.items():
+        groups = rng.choices(ids[group_label], cum_weights=weights[group_label], k=len(ids[item_label]))
+        relationships.extend({"type": rel_type, "startNode": item, "endNode": group}
+                             for item, group in zip(ids[item_label], groups))
+
+    return {"nodes": nodes, "relationships": relationships}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic catalog in data.json format")
+    parser.add_argument("--nodes", type=int, default=10000, help="approximate number of nodes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="output JSON file")
+    args = parser.parse_args()
+
+    data = generate(args.nodes, args.seed)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    print(f"Generated {len(data['nodes'])} nodes and {len(data['relationships'])} relationships -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Загрузка синтетического каталога в локальный Neo4j (например, контейнер db из docker-compose).
+
+База очищается, каталог загружается пачками тем же загрузчиком, что и /api/import, после
+чего увеличивается версия каталога, чтобы запущенный backend сбросил кеши и снимок графа.
+
+    NEO4J_URI=bolt://localhost:7687 NEO4J_USER=neo4j NEO4J_PASSWORD=... \
+        python -m benchmark.load benchmark/data/catalog_100k.json --zip benchmark/data/catalog_100k.zip
+"""
+import argparse
+import asyncio
+import json
+import os
+import zipfile
+from neo4j import AsyncGraphDatabase
+from loader import bulk_load
+from catalog import bump_catalog_version
+from database import ensure_schema
+
+NEO4J_URI = os.getenv("NEO4J_URI")
+NEO4J_USER = os.getenv("NEO4J_USER")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+
+async def wipe(driver):
+    # Большой каталог удаляется частями, иначе одна транзакция не поместится в память Neo4j
+    async with driver.session() as session:
+        result = await session.run(
+            """
+            MATCH (n) WHERE NOT n:CatalogVersion
+            CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS
+            """
+        )
+        await result.consume()
+
+
+async def load(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    async with AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)) as driver:
+        await ensure_schema(driver)
+        await wipe(driver)
+        stats = await bulk_load(driver, data["nodes"], data["relationships"])
+        await bump_catalog_version(driver)
+    return stats
+
+
+def write_archive(path, archive_path):
+    """Архив в формате /api/import - для сценария импорта в benchmark.run."""
+    with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.write(path, "data.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a generated catalog into Neo4j")
+    parser.add_argument("catalog", help="JSON file produced by benchmark.generate")
+    parser.add_argument("--zip", help="also write an import archive with this path")
+    args = parser.parse_args()
+
+    stats = asyncio.run(load(args.catalog))
+    print(f"Loaded {stats['nodes']} nodes ({stats['nodes_per_sec']}/s) "
+          f"and {stats['relationships']} relationships ({stats['relationships_per_sec']}/s)")
+    if args.zip:
+        write_archive(args.catalog, args.zip)
+        print(f"Import archive -> {args.zip}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""Нагрузочный прогон всех групп маршрутов работающего backend.
+
+Для каждого сценария выполняется --requests запросов с --concurrency одновременными
+клиентами; в JSON сохраняются p50/p95/p99, пропускная способность, ошибки и пиковая
+память контейнера backend (через docker stats, если доступен).
+
+    python -m benchmark.run --concurrency 32 --requests 500 --out benchmark/results/$(git rev-parse --short HEAD).json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import quote
+import httpx
+
+# Тяжелые сценарии (весь граф, выгрузка, импорт) гоняются меньшим числом запросов
+HEAVY_SCENARIOS = {"graph_full", "graph_compact", "export", "import"}
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def parse_memory(value):
+    """'123.4MiB / 2GiB' -> мегабайты."""
+    used = value.split("/")[0].strip()
+    units = {"KiB": 1 / 1024, "MiB": 1, "GiB": 1024, "kB": 1 / 1000, "MB": 1, "GB": 1000, "B": 1 / 1024 / 1024}
+    for unit, factor in units.items():
+        if used.endswith(unit):
+            return float(used[:-len(unit)]) * factor
+    return None
+
+
+class MemorySampler(threading.Thread):
+    """Раз в секунду читает память контейнера backend; peak() - максимум с последнего reset()."""
+
+    def __init__(self, container):
+        super().__init__(daemon=True)
+        self.container = container
+        self._peak = None
+        self._stop = threading.Event()
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                output = subprocess.run(
+                    ["docker", "stats", "--no-stream", "--format", "{{.MemUsage}}", self.container],
+                    capture_output=True, text=True, timeout=10
+                ).stdout
+                memory = parse_memory(output) if output else None
+            except (OSError, subprocess.SubprocessError):
+                return
+            if memory is not None:
+                self._peak = memory if self._peak is None else max(self._peak, memory)
+            self._stop.wait(1)
+
+    def reset(self):
+        self._peak = None
+
+    def peak(self):
+        return round(self._peak, 1) if self._peak is not None else None
+
+    def stop(self):
+        self._stop.set()
+
+
+async def fetch_json(client, path):
+    response = await client.get(path)
+    response.raise_for_status()
+    data = response.json()
+    return data["items"] if isinstance(data, dict) and "items" in data else data
+
+
+async def collect_samples(client):
+    """Имена и id из самого каталога, чтобы запросы попадали в существующие данные."""
+    professions = [p["profession"] for p in await fetch_json(client, "/api/professions?limit=100")]
+    skills = [s["skill"] for s in await fetch_json(client, "/api/skills?limit=100")]
+    technologies = [t["technology"] for t in await fetch_json(client, "/api/technologies?limit=100")]
+    tools = [t["tool"] for t in await fetch_json(client, "/api/tools?limit=100")]
+    categories = [g["name"] for g in await fetch_json(client, "/api/groups/categories?limit=100")]
+    skillgroups = [g["name"] for g in await fetch_json(client, "/api/groups/skillgroups?limit=100")]
+    ids = []
+    for name in professions[:10]:
+        response = await client.get("/api/get_id", params={"name": name})
+        if response.status_code == 200:
+            ids.append(response.json()["id"])
+    words = [word for name in professions + skills for word in name.split() if len(word) > 3]
+    return {
+        "professions": professions, "skills": skills, "technologies": technologies, "tools": tools,
+        "categories": categories, "skillgroups": skillgroups, "ids": ids, "words": words,
+    }
+
+
+def build_scenarios(samples, archive):
+    """Сценарий - функция, возвращающая аргументы очередного запроса для httpx."""
+    pick = lambda key: quote(random.choice(samples[key]), safe="")
+    scenarios = {
+        "list_professions": lambda: ("GET", "/api/professions"),
+        "list_skills": lambda: ("GET", "/api/skills"),
+        "list_technologies": lambda: ("GET", "/api/technologies"),
+        "list_tools": lambda: ("GET", "/api/tools"),
+        "list_groups": lambda: ("GET", "/api/groups/skillgroups"),
+        "list_professions_page": lambda: ("GET", "/api/professions?limit=50"),
+        "filter_professions_by_category": lambda: ("GET", f"/api/professions/filter/categories/{pick('categories')}"),
+        "filter_professions_by_skill": lambda: ("GET", f"/api/professions/filter/skills/{pick('skills')}"),
+        "filter_skills_by_group": lambda: ("GET", f"/api/skills/filter/skillgroups/{pick('skillgroups')}"),
+        "search_professions": lambda: ("GET", f"/api/professions/search/by_name/{pick('words')}"),
+        "search_catalog": lambda: ("GET", f"/api/search?q={pick('words')}"),
+        "detail_profession": lambda: ("GET", f"/api/professions/{pick('professions')}"),
+        "detail_skill": lambda: ("GET", f"/api/skills/{pick('skills')}"),
+        "detail_technology": lambda: ("GET", f"/api/technologies/{pick('technologies')}"),
+        "detail_tool": lambda: ("GET", f"/api/tools/{pick('tools')}"),
+        "detail_group": lambda: ("GET", f"/api/groups/name/{pick('categories')}"),
+        "batch_professions": lambda: ("POST", "/api/professions/batch",
+                                      {"json": {"names": random.sample(samples["professions"],
+                                                                       min(20, len(samples["professions"])))}}),
+        "similar_professions": lambda: ("GET", f"/api/professions/{pick('professions')}/similar"),
+        "graph_full": lambda: ("GET", "/api/graph"),
+        "graph_compact": lambda: ("GET", "/api/graph?format=compact"),
+        "graph_filtered": lambda: ("GET", "/api/graph/professions"),
+        "graph_neighborhood": lambda: ("GET", f"/api/graph/neighborhood/{pick('ids')}?depth=2"),
+        "export": lambda: ("GET", "/api/export"),
+    }
+    if not samples["ids"]:
+        del scenarios["graph_neighborhood"]
+    if archive:
+        def import_request():
+            with open(archive, "rb") as f:
+                content = f.read()
+            return "POST", "/api/import", {"files": {"archive": ("catalog.zip", content, "application/zip")}}
+        scenarios["import"] = import_request
+    return scenarios
+
+
+async def run_scenario(client, make_request, total, concurrency):
+    latencies = []
+    errors = 0
+    received = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors, received
+        for _ in remaining:
+            method, path, *extra = make_request()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **(extra[0] if extra else {}))
+                received += len(response.content)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    as_ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        "requests": total,
+        "errors": errors,
+        "concurrency": concurrency,
+        "p50_ms": as_ms(percentile(latencies, 50)),
+        "p95_ms": as_ms(percentile(latencies, 95)),
+        "p99_ms": as_ms(percentile(latencies, 99)),
+        "mean_ms": as_ms(sum(latencies) / len(latencies)) if latencies else None,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+        "bytes_received": received,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+async def main_async(args):
+    sampler = MemorySampler(args.container) if args.container else None
+    if sampler:
+        sampler.start()
+
+    results = {}
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        samples = await collect_samples(client)
+        scenarios = build_scenarios(samples, args.include_import)
+        selected = args.scenarios.split(",") if args.scenarios else list(scenarios)
+
+        # Импорт заменяет каталог, поэтому всегда идет последним
+        for name in sorted(selected, key=lambda n: n == "import"):
+            if name not in scenarios:
+                print(f"Unknown scenario {name}, skipped")
+                continue
+            heavy = name in HEAVY_SCENARIOS
+            total = args.heavy_requests if heavy else args.requests
+            concurrency = 1 if name == "import" else min(args.concurrency, total)
+            if sampler:
+                sampler.reset()
+            result = await run_scenario(client, scenarios[name], total, concurrency)
+            result["memory_peak_mb"] = sampler.peak() if sampler else None
+            results[name] = result
+            print(f"{name:35} p50={result['p50_ms']}ms p95={result['p95_ms']}ms p99={result['p99_ms']}ms "
+                  f"{result['throughput_rps']} rps errors={result['errors']}")
+
+    if sampler:
+        sampler.stop()
+
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "heavy_requests": args.heavy_requests,
+        },
+        "scenarios": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Results -> {args.out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive every router of a running backend and record latencies")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--heavy-requests", type=int, default=10, help="requests for graph, export and import")
+    parser.add_argument("--scenarios", help="comma-separated subset of scenarios")
+    parser.add_argument("--include-import", metavar="ARCHIVE",
+                        help="also benchmark /api/import with this archive (replaces the catalog)")
+    parser.add_argument("--container", default="fastapi_backend",
+                        help="docker container to sample memory from; empty string disables sampling")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--out", required=True, help="output JSON file")
+    args = parser.parse_args()
+    random.seed(0)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import wraps
+from starlette.responses import Response
+from catalog import get_catalog_version, get_catalog_updated_at, on_catalog_change
+
+# Максимальное число закешированных ответов на один воркер
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+
+# Маршруты чтения без валидаторов: архив выгрузки каждый раз собирается заново
+CONDITIONAL_EXCLUDED_PATHS = ("/api/export",)
+
+_MISSING = object()
+
+
+class ResponseCache:
+    """LRU-кеш готовых ответов; целиком сбрасывается при смене версии каталога."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        value = self._entries.get(key, _MISSING)
+        if value is not _MISSING:
+            self._entries.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+
+
+@on_catalog_change
+def _drop_stale_responses(version):
+    response_cache.clear()
+
+
+def cached(func):
+    """Кеширует результат обработчика по имени маршрута и его параметрам."""
+    route = f"{func.__module__}.{func.__name__}"
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        key = (route, args, tuple(sorted(kwargs.items())))
+        value = response_cache.get(key)
+        if value is not _MISSING:
+            return value
+
+        version = get_catalog_version()
+        value = await func(*args, **kwargs)
+        # Если каталог изменился, пока шел запрос, ответ может быть уже устаревшим
+        if get_catalog_version() == version:
+            response_cache.set(key, value)
+        return value
+    return wrapper
+
+
+def _http_date(iso_time):
+    return format_datetime(datetime.fromisoformat(iso_time).astimezone(timezone.utc), usegmt=True)
+
+
+def _not_modified(request, etag, updated_at):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # "*" не учитывается: до вызова обработчика неизвестно, существует ли ресурс (200, а не 404/422)
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return etag in candidates or etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and updated_at:
+        modified = datetime.fromisoformat(updated_at).replace(microsecond=0)
+        try:
+            return modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def conditional_get(request, call_next):
+    """Middleware: валидаторы ETag/Last-Modified по версии каталога и ответ 304 для GET-запросов чтения."""
+    version = get_catalog_version()
+    path = request.url.path
+    if (request.method != "GET" or version is None
+            or not path.startswith("/api/") or path.startswith(CONDITIONAL_EXCLUDED_PATHS)):
+        return await call_next(request)
+
+    updated_at = get_catalog_updated_at()
+    # Один и тот же маршрут может отдавать JSON или MessagePack, валидатор у них должен различаться
+    representation = "-msgpack" if "application/msgpack" in request.headers.get("accept", "") else ""
+    headers = {"ETag": f'W/"{version}{representation}"', "Cache-Control": "no-cache", "Vary": "Accept"}
+    if updated_at:
+        headers["Last-Modified"] = _http_date(updated_at)
+
+    if _not_modified(request, headers["ETag"], updated_at):
+        return Response(status_code=304, headers=headers)
+
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
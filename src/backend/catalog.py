@@ -0,0 +1,92 @@
+import asyncio
+import os
+from utils import get_utc3_time
+from metrics import run_query
+from queries import register, read_one, write_session
+
+# Как часто (в секундах) каждый воркер сверяет свою версию каталога с версией в Neo4j
+CATALOG_VERSION_POLL_INTERVAL = float(os.getenv("CATALOG_VERSION_POLL_INTERVAL", "2"))
+
+_version = None
+_updated_at = None
+_listeners = []
+
+
+def on_catalog_change(callback):
+    """Регистрирует callback(version), вызываемый при каждой смене версии каталога."""
+    _listeners.append(callback)
+    return callback
+
+
+def get_catalog_version():
+    return _version
+
+
+def get_catalog_updated_at():
+    return _updated_at
+
+
+def _set_version(version, updated_at):
+    global _version, _updated_at
+    # Версия читается и с реплик, которые могут отставать: более старую не принимаем
+    if _version is not None and version <= _version:
+        return
+    _version = version
+    _updated_at = updated_at
+    for callback in _listeners:
+        callback(version)
+
+
+FETCH_CATALOG_VERSION_QUERY = register("catalog.fetch_catalog_version", """
+    MATCH (v:CatalogVersion {id: "catalog"})
+    RETURN v.version AS version, v.time AS time
+    """)
+
+
+async def fetch_catalog_version(driver):
+    record = await read_one(driver, FETCH_CATALOG_VERSION_QUERY)
+    if record:
+        _set_version(record["version"], record["time"])
+    return _version
+
+
+async def ensure_catalog_version(driver):
+    """Создает узел версии при первом запуске приложения на новой базе."""
+    async with write_session(driver) as session:
+        result = await run_query(session, "catalog.ensure_catalog_version",
+            """
+            MERGE (v:CatalogVersion {id: "catalog"})
+            ON CREATE SET v.version = 1, v.time = $time
+            RETURN v.version AS version, v.time AS time
+            """,
+            {"time": get_utc3_time()}
+        )
+        record = await result.single()
+    _set_version(record["version"], record["time"])
+    return _version
+
+
+async def bump_catalog_version(driver):
+    """Увеличивает версию каталога после записи; вызывается всеми изменяющими маршрутами."""
+    async with write_session(driver) as session:
+        result = await run_query(session, "catalog.bump_catalog_version",
+            """
+            MERGE (v:CatalogVersion {id: "catalog"})
+            ON CREATE SET v.version = 0
+            SET v.version = v.version + 1, v.time = $time
+            RETURN v.version AS version, v.time AS time
+            """,
+            {"time": get_utc3_time()}
+        )
+        record = await result.single()
+    _set_version(record["version"], record["time"])
+    return _version
+
+
+async def watch_catalog_version(driver):
+    while True:
+        await asyncio.sleep(CATALOG_VERSION_POLL_INTERVAL)
+        try:
+            await fetch_catalog_version(driver)
+        except Exception as e:
+            print(f"Failed to poll catalog version: {e}")
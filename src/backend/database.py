@@ -1,26 +1,74 @@
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase
+import asyncio
 import os
 from contextlib import asynccontextmanager
+from images import build_manifest
+from utils import SCHEMA_QUERIES, BACKFILL_NAME_KEY_QUERY
+from metrics import run_query
+from catalog import ensure_catalog_version, fetch_catalog_version, watch_catalog_version
+from queries import on_client_bookmark
+from graph_snapshot import get_snapshot
+from slow_queries import enable_query_plans
 
 NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USER")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+# Размер пула соединений на один воркер и время ожидания свободного соединения
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "30"))
+
+driver = AsyncGraphDatabase.driver(
+    NEO4J_URI,
+    auth=(NEO4J_USER, NEO4J_PASSWORD),
+    max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+    connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT,
+)
+
+@on_client_bookmark
+async def _refresh_catalog_version():
+    await fetch_catalog_version(driver)
 
 @asynccontextmanager
 async def lifespan(app):
     try:
-        with driver.session() as session:
-            session.run("RETURN 1")
+        await driver.verify_connectivity()
         print("Successfully connected to Neo4j")
     except Exception as e:
         print(f"Failed to connect to Neo4j: {e}")
         raise
+    await ensure_schema(driver)
+    await backfill_name_keys(driver)
+    enable_query_plans(driver)
+    build_manifest()
+    await ensure_catalog_version(driver)
+    await get_snapshot(driver)
+    version_watcher = asyncio.create_task(watch_catalog_version(driver))
     yield
-    driver.close()
+    version_watcher.cancel()
+    await driver.close()
+
+async def ensure_schema(driver):
+    async with driver.session() as session:
+        for query in SCHEMA_QUERIES:
+            try:
+                result = await run_query(session, "database.ensure_schema", query)
+                await result.consume()
+            except Exception as e:
+                print(f"Failed to apply schema statement '{query}': {e}")
+
+async def backfill_name_keys(driver):
+    # Пачками в отдельных транзакциях (CALL IN TRANSACTIONS), поэтому в неявной транзакции сессии
+    async with driver.session() as session:
+        try:
+            result = await run_query(session, "database.backfill_name_keys", BACKFILL_NAME_KEY_QUERY)
+            await result.consume()
+        except Exception as e:
+            print(f"Failed to backfill name keys: {e}")
 
-def check_database_empty(driver):
-    with driver.session() as session:
-        result = session.run("MATCH (n) RETURN count(n) AS count LIMIT 1")
-        return result.single()["count"] == 0
+async def check_database_empty(driver):
+    async with driver.session() as session:
+        result = await run_query(session, "database.check_database_empty",
+                                 "MATCH (n) WHERE NOT n:CatalogVersion RETURN count(n) AS count LIMIT 1")
+        record = await result.single()
+        return record["count"] == 0
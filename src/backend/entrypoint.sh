@@ -3,5 +3,10 @@
 # Запуск скрипта инициализации данных
 python init_data.py
 
+# Общая папка метрик воркеров gunicorn; очищается при каждом запуске, чтобы не смешивать значения
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 # Запуск основного приложения
-exec gunicorn main:app --bind 0.0.0.0:8000 --workers 4 --worker-class uvicorn.workers.UvicornWorker
+exec gunicorn main:app --config gunicorn.conf.py --bind 0.0.0.0:8000 --workers 4 --worker-class uvicorn.workers.UvicornWorker
@@ -0,0 +1,150 @@
+import asyncio
+import numpy as np
+from neo4j import READ_ACCESS
+from queries import bookmark_manager
+from catalog import get_catalog_version
+from metrics import run_query
+from utils import NAME_KEY
+
+
+class GraphSnapshot:
+    """Неизменяемый снимок графа каталога в памяти воркера.
+
+    Узлы пронумерованы 0..n-1, их записи хранятся один раз. Связи лежат в двух
+    CSR-массивах (исходящие и входящие): соседи узла i - indices[indptr[i]:indptr[i + 1]],
+    а types в той же позиции - код типа связи.
+    """
+
+    def __init__(self, version, keys, labels, properties, edges):
+        self.version = version
+        self.keys = keys
+        self.index = {key: i for i, key in enumerate(keys)}
+        self.properties = properties
+
+        self.label_names = sorted(set(labels))
+        label_codes = {label: i for i, label in enumerate(self.label_names)}
+        self.labels = np.array([label_codes[label] for label in labels], dtype=np.int16)
+
+        self.type_names = sorted({rel_type for _, _, rel_type in edges})
+        type_codes = {rel_type: i for i, rel_type in enumerate(self.type_names)}
+        sources = np.array([self.index[s] for s, _, _ in edges], dtype=np.int64)
+        targets = np.array([self.index[t] for _, t, _ in edges], dtype=np.int64)
+        types = np.array([type_codes[t] for _, _, t in edges], dtype=np.int16)
+
+        self.out_indptr, self.out_indices, self.out_types = self._csr(sources, targets, types)
+        self.in_indptr, self.in_indices, self.in_types = self._csr(targets, sources, types)
+
+        # Порядок узлов по имени - для детерминированного обхода при ограничении по числу узлов
+        order = sorted(range(len(keys)), key=lambda i: (str(properties[i].get("name", "")).lower(), keys[i]))
+        self.rank = np.empty(len(keys), dtype=np.int64)
+        self.rank[order] = np.arange(len(keys))
+
+        self.records = [
+            {"id": key, "label": label, "properties": props}
+            for key, label, props in zip(keys, labels, properties)
+        ]
+
+    def _csr(self, rows, cols, types):
+        order = np.argsort(rows, kind="stable")
+        indptr = np.zeros(len(self.keys) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(self.keys)), out=indptr[1:])
+        return indptr, cols[order], types[order]
+
+    @property
+    def node_count(self):
+        return len(self.keys)
+
+    @property
+    def degree(self):
+        return np.diff(self.out_indptr) + np.diff(self.in_indptr)
+
+    def label_code(self, label):
+        try:
+            return self.label_names.index(label)
+        except ValueError:
+            return -1
+
+    def type_mask(self, types, rel_types):
+        if rel_types is None:
+            return np.ones(len(types), dtype=bool)
+        codes = [self.type_names.index(t) for t in rel_types if t in self.type_names]
+        return np.isin(types, codes)
+
+    def out_edges(self, nodes, rel_types=None):
+        """Исходящие связи узлов nodes: массивы (source, target, type)."""
+        return self._edges(self.out_indptr, self.out_indices, self.out_types, nodes, rel_types)
+
+    def in_edges(self, nodes, rel_types=None):
+        """Входящие связи узлов nodes: массивы (source, target, type), source - соседний узел."""
+        sources, targets, types = self._edges(self.in_indptr, self.in_indices, self.in_types, nodes, rel_types)
+        return targets, sources, types
+
+    def _edges(self, indptr, indices, types, nodes, rel_types):
+        nodes = np.asarray(nodes, dtype=np.int64)
+        starts = indptr[nodes]
+        counts = indptr[nodes + 1] - starts
+        owners = np.repeat(nodes, counts)
+        # Позиции всех соседей подряд: start узла + смещение внутри его строки
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        positions = np.repeat(starts, counts) + offsets
+        mask = self.type_mask(types[positions], rel_types)
+        return owners[mask], indices[positions][mask], types[positions][mask]
+
+    def links(self, sources, targets, types):
+        return [
+            {"type": self.type_names[t], "source": self.keys[s], "target": self.keys[d]}
+            for s, d, t in zip(sources.tolist(), targets.tolist(), types.tolist())
+        ]
+
+    def all_edges(self):
+        sources = np.repeat(np.arange(self.node_count), np.diff(self.out_indptr))
+        return sources, self.out_indices, self.out_types
+
+
+async def load_snapshot(driver):
+    version = get_catalog_version()
+    async with driver.session(default_access_mode=READ_ACCESS, bookmark_manager=bookmark_manager()) as session:
+        async with await session.begin_transaction() as tx:
+            result = await run_query(tx, "graph_snapshot.nodes",
+                """
+                MATCH (n) WHERE NOT n:CatalogVersion
+                RETURN coalesce(n.id, elementId(n)) AS key, labels(n)[0] AS label, properties(n) AS properties
+                """
+            )
+            keys, labels, properties = [], [], []
+            seen = set()
+            async for record in result:
+                if record["key"] in seen:
+                    continue
+                seen.add(record["key"])
+                keys.append(record["key"])
+                labels.append(record["label"] or "Unknown")
+                node_properties = dict(record["properties"])
+                node_properties.pop(NAME_KEY, None)
+                properties.append(node_properties)
+
+            result = await run_query(tx, "graph_snapshot.relationships",
+                """
+                MATCH (a)-[r]->(b)
+                RETURN coalesce(a.id, elementId(a)) AS source, coalesce(b.id, elementId(b)) AS target, type(r) AS type
+                """
+            )
+            edges = [(record["source"], record["target"], record["type"]) async for record in result]
+
+    return GraphSnapshot(version, keys, labels, properties, edges)
+
+
+_snapshot = None
+_lock = asyncio.Lock()
+
+
+async def get_snapshot(driver):
+    """Текущий снимок; перестраивается при первом чтении после смены версии каталога."""
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == get_catalog_version():
+        return snapshot
+    async with _lock:
+        if _snapshot is None or _snapshot.version != get_catalog_version():
+            _snapshot = await load_snapshot(driver)
+        return _snapshot
@@ -0,0 +1,6 @@
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    # Файлы метрик умершего воркера объединяются с остальными, а его gauge больше не учитываются
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,74 @@
+import os
+import time
+
+IMAGE_DIR = "static/images"
+IMAGE_BASE_URL = "http://localhost:8000/static/images"
+DEFAULT_IMAGE_URL = f"{IMAGE_BASE_URL}/in_progress.jpg"
+
+# Порядок важен: если для одного id лежит несколько файлов, берется первое расширение из списка
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
+
+# Как часто (в секундах) проверять mtime папки, чтобы подхватить изменения других воркеров
+MANIFEST_CHECK_INTERVAL = float(os.getenv("IMAGE_MANIFEST_CHECK_INTERVAL", "1"))
+
+os.makedirs(IMAGE_DIR, exist_ok=True)
+
+_manifest = {}
+_dir_mtime = None
+_checked_at = 0.0
+
+
+def _priority(filename):
+    return IMAGE_EXTENSIONS.index(os.path.splitext(filename)[1])
+
+
+def _is_image(filename):
+    return os.path.splitext(filename)[1] in IMAGE_EXTENSIONS
+
+
+def build_manifest():
+    """Сканирует папку с изображениями и строит словарь id -> имя файла."""
+    global _manifest, _dir_mtime, _checked_at
+    manifest = {}
+    with os.scandir(IMAGE_DIR) as entries:
+        for entry in entries:
+            if not entry.is_file() or not _is_image(entry.name):
+                continue
+            image_id = os.path.splitext(entry.name)[0]
+            current = manifest.get(image_id)
+            if current is None or _priority(entry.name) < _priority(current):
+                manifest[image_id] = entry.name
+    _manifest = manifest
+    _dir_mtime = os.stat(IMAGE_DIR).st_mtime_ns
+    _checked_at = time.monotonic()
+
+
+def _refresh_if_stale():
+    global _checked_at
+    now = time.monotonic()
+    if now - _checked_at < MANIFEST_CHECK_INTERVAL:
+        return
+    _checked_at = now
+    if os.stat(IMAGE_DIR).st_mtime_ns != _dir_mtime:
+        build_manifest()
+
+
+def get_image_url(image_id):
+    _refresh_if_stale()
+    filename = _manifest.get(str(image_id))
+    if filename is None:
+        return DEFAULT_IMAGE_URL
+    return f"{IMAGE_BASE_URL}/{filename}"
+
+
+def register_image(image_id, filename):
+    """Учитывает в манифесте файл, только что записанный в IMAGE_DIR."""
+    if not _is_image(filename):
+        return
+    current = _manifest.get(str(image_id))
+    if current is None or _priority(filename) <= _priority(current):
+        _manifest[str(image_id)] = filename
+
+
+def forget_image(image_id):
+    _manifest.pop(str(image_id), None)
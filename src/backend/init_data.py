@@ -2,7 +2,7 @@ import os
 import time
 import json
 from neo4j import GraphDatabase
-from utils import get_utc3_time
+from utils import get_utc3_time, create_relationship_query, set_name_key, SCHEMA_QUERIES
 import datetime 
 
 NEO4J_URI = os.getenv("NEO4J_URI")
@@ -12,25 +12,26 @@ NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 def check_database_empty(driver):
     with driver.session() as session:
         result = session.run(
-            "MATCH (n) RETURN count(n) AS count LIMIT 1"
+            "MATCH (n) WHERE NOT n:CatalogVersion RETURN count(n) AS count LIMIT 1"
         )
         return result.single()["count"] == 0
         
 def create_node(tx, label, properties):
-    query = f"CREATE (n:{label} $properties)"
+    query = f"CREATE (n:{label} $properties) {set_name_key()}"
     tx.run(query, properties=properties)
 
 
 def create_relationship(tx, start_node_id, end_node_id, relationship_type):
-    query = f"""
-    MATCH (a), (b)
-    WHERE a.id = $start_node_id AND b.id = $end_node_id
-    CREATE (a)-[r:{relationship_type}]->(b)
-    RETURN r
-    """
+    query = create_relationship_query(relationship_type)
     tx.run(query, start_node_id=start_node_id, end_node_id=end_node_id)
 
 
+def ensure_schema(driver):
+    with driver.session() as session:
+        for query in SCHEMA_QUERIES:
+            session.run(query).consume()
+
+
 def load_data_from_json(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:  # Открытие с кодировкой UTF-8
         data = json.load(f)
@@ -66,6 +67,7 @@ if __name__ == "__main__":
                 auth=(NEO4J_USER, NEO4J_PASSWORD)
             )
             driver.verify_connectivity()
+            ensure_schema(driver)
             
             if check_database_empty(driver):
                 print("Database is empty. Initializing data...")
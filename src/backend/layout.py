@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import os
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+# Число итераций раскладки
+LAYOUT_ITERATIONS = int(os.getenv("LAYOUT_ITERATIONS", "300"))
+# Координаты в ответе - в квадрате примерно LAYOUT_SCALE x LAYOUT_SCALE с центром в нуле
+LAYOUT_SCALE = 1000
+# До этого числа узлов отталкивание считается точно (все пары), дальше - приближенно по сетке
+LAYOUT_EXACT_MAX_NODES = int(os.getenv("LAYOUT_EXACT_MAX_NODES", "1000"))
+# Сторона сетки приближенного отталкивания: ячеек LAYOUT_GRID_SIZE x LAYOUT_GRID_SIZE
+LAYOUT_GRID_SIZE = int(os.getenv("LAYOUT_GRID_SIZE", "32"))
+# Строк за один шаг: на итерацию нужно около LAYOUT_BLOCK_SIZE x (узлов или ячеек) x 16 байт
+LAYOUT_BLOCK_SIZE = int(os.getenv("LAYOUT_BLOCK_SIZE", "512"))
+# Для графов больше этого раскладка на сервере не считается
+LAYOUT_MAX_NODES = int(os.getenv("LAYOUT_MAX_NODES", "50000"))
+
+
+def initial_positions(keys):
+    """Начальная точка узла - из хеша его id: одна и та же во всех воркерах и во всех версиях."""
+    digests = b"".join(hashlib.blake2b(str(key).encode("utf-8"), digest_size=8).digest() for key in keys)
+    return np.frombuffer(digests, dtype="<u4").reshape(-1, 2) / 2.0 ** 32 - 0.5
+
+
+def repulsion(points, sources, masses, k2, softening=1e-9):
+    """Суммарная сила отталкивания точек от sources с массами masses, блоками строк.
+
+    sum_j w_ij (p_i - s_j) = p_i * sum_j w_ij - W @ s, а квадраты расстояний берутся
+    через скалярные произведения, поэтому на блок нужна одна матрица block x sources.
+    """
+    result = np.empty_like(points)
+    squares = (sources ** 2).sum(axis=1)
+    for start in range(0, len(points), LAYOUT_BLOCK_SIZE):
+        block = points[start:start + LAYOUT_BLOCK_SIZE]
+        dist2 = (block ** 2).sum(axis=1)[:, None] + squares[None, :] - 2 * block @ sources.T
+        weights = np.divide(masses * k2, np.maximum(dist2, softening, out=dist2), out=dist2)
+        result[start:start + LAYOUT_BLOCK_SIZE] = block * weights.sum(axis=1)[:, None] - weights @ sources
+    return result
+
+
+def grid_repulsion(pos, k2):
+    """Приближенное отталкивание: узлы собираются в ячейки сетки, ячейки отталкиваются
+    друг от друга как точки в центре масс с массой, равной числу узлов, а внутри своей
+    ячейки узел отталкивается от ее центра масс. Стоимость - O(ячеек^2 + n) на итерацию."""
+    low = pos.min(axis=0)
+    size = np.maximum(pos.max(axis=0) - low, 1e-9)
+    xy = np.minimum((pos - low) / size * LAYOUT_GRID_SIZE, LAYOUT_GRID_SIZE - 1).astype(np.int64)
+    cells = xy[:, 0] * LAYOUT_GRID_SIZE + xy[:, 1]
+    masses = np.bincount(cells, minlength=LAYOUT_GRID_SIZE ** 2).astype(np.float64)
+    occupied = np.flatnonzero(masses)
+    centroids = np.stack([
+        np.bincount(cells, weights=pos[:, 0], minlength=LAYOUT_GRID_SIZE ** 2)[occupied],
+        np.bincount(cells, weights=pos[:, 1], minlength=LAYOUT_GRID_SIZE ** 2)[occupied],
+    ], axis=1) / masses[occupied, None]
+    # Смягчение порядка размера ячейки: узел рядом с центром масс не получает огромную силу
+    softening = float((size / LAYOUT_GRID_SIZE).min() ** 2) / 4
+    field = repulsion(centroids, centroids, masses[occupied], k2, softening)
+
+    slot = np.empty(LAYOUT_GRID_SIZE ** 2, dtype=np.int64)
+    slot[occupied] = np.arange(len(occupied))
+    own = slot[cells]
+    delta = pos - centroids[own]
+    dist2 = np.maximum((delta ** 2).sum(axis=1), softening)
+    return field[own] + delta * (masses[occupied][own] * k2 / dist2)[:, None]
+
+
+def force_layout(pos, sources, targets, iterations, temperature):
+    """Раскладка Фрухтермана-Рейнгольда.
+
+    Память на итерацию - O(LAYOUT_BLOCK_SIZE x n) для точного отталкивания и
+    O(LAYOUT_BLOCK_SIZE x ячеек сетки) для приближенного, а не O(n x n).
+    """
+    n = len(pos)
+    k = 1.0 / np.sqrt(max(n, 1))
+    cooling = (0.01 / temperature) ** (1.0 / max(iterations, 1))
+    ones = np.ones(n)
+
+    for _ in range(iterations):
+        # Отталкивание от всех узлов графа: точно или по сетке
+        if n <= LAYOUT_EXACT_MAX_NODES:
+            disp = repulsion(pos, pos, ones, k * k)
+        else:
+            disp = grid_repulsion(pos, k * k)
+
+        # Притяжение вдоль связей
+        d = pos[sources] - pos[targets]
+        dist = np.sqrt((d ** 2).sum(axis=-1)) + 1e-9
+        force = d * (dist / k)[:, None]
+        np.add.at(disp, sources, -force)
+        np.add.at(disp, targets, force)
+
+        # Слабая гравитация к центру, чтобы несвязные компоненты не разлетались
+        disp -= pos * k
+
+        length = np.sqrt((disp ** 2).sum(axis=-1)) + 1e-9
+        pos += disp / length[:, None] * np.minimum(length, temperature)[:, None]
+        temperature *= cooling
+    return pos
+
+
+class Layout:
+    def __init__(self, snapshot, positions):
+        self.version = snapshot.version
+        self.snapshot = snapshot
+        self.positions = positions
+
+    def coordinates(self):
+        scaled = np.round(self.positions * LAYOUT_SCALE, 2).tolist()
+        return {key: xy for key, xy in zip(self.snapshot.keys, scaled)}
+
+
+def compute_layout(snapshot):
+    """Раскладка зависит только от узлов и связей снимка, а не от истории воркера.
+
+    Каждый воркер считает ее сам, поэтому для одной версии каталога (одного ETag) все
+    должны получить одни и те же числа: узлы и связи упорядочиваются по id, чтобы порядок
+    строк из Neo4j не менял порядок суммирования, а начальные точки берутся из хешей id.
+    """
+    n = snapshot.node_count
+    order = np.array(sorted(range(n), key=lambda i: str(snapshot.keys[i])), dtype=np.int64)
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    sources = rank[np.repeat(np.arange(n), np.diff(snapshot.out_indptr))]
+    targets = rank[snapshot.out_indices]
+    edges = np.lexsort((targets, sources))
+
+    pos = initial_positions([snapshot.keys[i] for i in order.tolist()])
+    pos = force_layout(pos, sources[edges], targets[edges], LAYOUT_ITERATIONS, 0.1)
+    return Layout(snapshot, pos[rank])
+
+
+_layout = None
+_lock = asyncio.Lock()
+
+
+async def get_layout(snapshot):
+    """Раскладка для снимка графа; кешируется по версии каталога."""
+    global _layout
+    layout = _layout
+    if layout is not None and layout.version == snapshot.version and layout.snapshot is snapshot:
+        return layout
+    async with _lock:
+        if _layout is None or _layout.snapshot is not snapshot:
+            _layout = await run_in_threadpool(compute_layout, snapshot)
+        return _layout
@@ -0,0 +1,110 @@
+import os
+import time
+from collections import defaultdict
+from itertools import islice
+from fastapi.concurrency import run_in_threadpool
+from utils import relationship_endpoints, get_utc3_time, set_name_key
+from metrics import run_query
+from queries import write_session
+
+# Сколько узлов или связей уходит в одну транзакцию при массовой загрузке
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+async def chunked_in_threadpool(iterable, size):
+    """Пачки из синхронного итерируемого объекта; сам перебор (распаковка, разбор JSON)
+    выполняется в пуле потоков, чтобы большой импорт не останавливал остальные запросы воркера."""
+    iterator = chunked(iterable, size)
+    while (chunk := await run_in_threadpool(next, iterator, None)) is not None:
+        yield chunk
+
+
+async def create_nodes_batch(tx, rows_by_label):
+    created = 0
+    for label, rows in rows_by_label.items():
+        result = await run_query(tx, "loader.create_nodes_batch",
+            f"UNWIND $rows AS row CREATE (n:{label}) SET n = row {set_name_key()}",
+            rows=rows
+        )
+        summary = await result.consume()
+        created += summary.counters.nodes_created
+    return created
+
+
+async def create_relationships_batch(tx, rows_by_type):
+    created = 0
+    for relationship_type, rows in rows_by_type.items():
+        start_label, end_label = relationship_endpoints(relationship_type)
+        result = await run_query(tx, "loader.create_relationships_batch",
+            f"""
+            UNWIND $rows AS row
+            MATCH (a{start_label} {{id: row.startNode}})
+            MATCH (b{end_label} {{id: row.endNode}})
+            CREATE (a)-[:{relationship_type}]->(b)
+            """,
+            rows=rows
+        )
+        summary = await result.consume()
+        created += summary.counters.relationships_created
+    return created
+
+
+async def bulk_load(driver, nodes, relationships, batch_size=IMPORT_BATCH_SIZE, on_nodes=None):
+    """Загружает узлы и связи пачками через UNWIND, по одной транзакции на пачку.
+
+    nodes и relationships могут быть любыми итерируемыми объектами (в том числе
+    генераторами) в формате data.json; relationships перебирается только после nodes.
+    Узлы без имени и повторы имени внутри одной метки (без учета регистра)
+    пропускаются, как и при поштучном импорте. on_nodes, если задан, вызывается
+    в пуле потоков со списком (label, properties) каждой записанной пачки узлов.
+    """
+    seen_names = set()
+
+    def prepared_nodes():
+        for node in nodes:
+            label = node.get("label")
+            properties = node.get("properties", {})
+            name = properties.get("name")
+            if not name or (label, name.lower()) in seen_names:
+                continue
+            seen_names.add((label, name.lower()))
+            properties["time"] = get_utc3_time()
+            yield label, properties
+
+    nodes_created = 0
+    relationships_created = 0
+
+    async with write_session(driver) as session:
+        started = time.perf_counter()
+        async for chunk in chunked_in_threadpool(prepared_nodes(), batch_size):
+            rows_by_label = defaultdict(list)
+            for label, properties in chunk:
+                rows_by_label[label].append(properties)
+            nodes_created += await session.execute_write(create_nodes_batch, rows_by_label)
+            if on_nodes is not None:
+                await run_in_threadpool(on_nodes, chunk)
+        nodes_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        async for chunk in chunked_in_threadpool(relationships, batch_size):
+            rows_by_type = defaultdict(list)
+            for rel in chunk:
+                rows_by_type[rel["type"]].append({
+                    "startNode": rel["startNode"],
+                    "endNode": rel["endNode"]
+                })
+            relationships_created += await session.execute_write(create_relationships_batch, rows_by_type)
+        relationships_seconds = time.perf_counter() - started
+
+    return {
+        "nodes": nodes_created,
+        "relationships": relationships_created,
+        "nodes_per_sec": round(nodes_created / nodes_seconds, 1) if nodes_seconds else 0.0,
+        "relationships_per_sec": round(relationships_created / relationships_seconds, 1) if relationships_seconds else 0.0,
+    }
@@ -1,5 +1,8 @@
 from fastapi import FastAPI
 from database import lifespan
+from cache import conditional_get
+from metrics import track_requests
+from queries import track_bookmarks, BOOKMARK_HEADER, BOOKMARK_APPLIED_HEADER
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from routes import (
@@ -11,19 +14,32 @@ from routes import (
     api_export,
     api_groups,
     api_redact,
-    api_graph
+    api_graph,
+    api_search,
+    api_metrics
 )
 
 app = FastAPI(lifespan=lifespan)
 
+# Добавляется до CORS, чтобы ответы 304 тоже проходили через CORSMiddleware
+app.middleware("http")(conditional_get)
+
+# Снаружи conditional_get: версия каталога перечитывается по закладке клиента
+# до того, как кеш или ответ 304 сочтут локальные данные свежими
+app.middleware("http")(track_bookmarks)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[BOOKMARK_HEADER, BOOKMARK_APPLIED_HEADER],
 )
 
+# Добавляется последним, чтобы учитывать время всех остальных middleware и ответы 304
+app.middleware("http")(track_requests)
+
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 app.include_router(api_professions.router)
@@ -34,5 +50,6 @@ app.include_router(api_groups.router)
 app.include_router(api_import.router)
 app.include_router(api_export.router)
 app.include_router(api_redact.router)
-app.include_router(api_graph.router)    
-
+app.include_router(api_graph.router)
+app.include_router(api_search.router)
+app.include_router(api_metrics.router)
@@ -0,0 +1,110 @@
+import asyncio
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+# Вид требования -> метка узла и тип связи, которой профессия на него ссылается
+MATCH_KINDS = {
+    "skills": ("Skill", "REQUIRES"),
+    "technologies": ("Technology", "USES_TECH"),
+    "tools": ("Tool", "USES_TOOL"),
+}
+
+
+def pack_bits(bits):
+    """Упаковывает булеву матрицу по строкам в слова uint64."""
+    packed = np.packbits(bits, axis=-1, bitorder="little")
+    padding = -packed.shape[-1] % 8
+    if padding:
+        packed = np.pad(packed, [(0, 0)] * (packed.ndim - 1) + [(0, padding)])
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+class Matcher:
+    """Битовые множества навыков, технологий и инструментов каждой профессии для одного снимка графа."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.professions = np.flatnonzero(snapshot.labels == snapshot.label_code("Profession"))
+
+        # Общая нумерация признаков всех трех видов и поиск по имени без учета регистра
+        self.features = []
+        self.kinds = []
+        self.columns = {kind: {} for kind in MATCH_KINDS}
+        for kind, (label, _) in MATCH_KINDS.items():
+            for node in np.flatnonzero(snapshot.labels == snapshot.label_code(label)).tolist():
+                name = snapshot.properties[node].get("name")
+                if name is None:
+                    continue
+                self.columns[kind].setdefault(name.lower(), len(self.features))
+                self.features.append(node)
+                self.kinds.append(kind)
+        column_of = np.full(snapshot.node_count, -1, dtype=np.int64)
+        column_of[self.features] = np.arange(len(self.features))
+
+        # Все связи профессий с признаками одним вызовом; биты ставятся прямо в слова uint64
+        # (колонка c - бит c & 63 слова c >> 6, как в pack_bits)
+        self.width = max(len(self.features), 1)
+        self.bitsets = np.zeros((len(self.professions), -(-self.width // 64)), dtype=np.uint64)
+        row_of = np.zeros(snapshot.node_count, dtype=np.int64)
+        row_of[self.professions] = np.arange(len(self.professions))
+        rel_types = [rel_type for _, rel_type in MATCH_KINDS.values()]
+        sources, targets, _ = snapshot.out_edges(self.professions, rel_types)
+        columns = column_of[targets]
+        known = columns >= 0
+        rows, columns = row_of[sources[known]], columns[known]
+        np.bitwise_or.at(self.bitsets, (rows, columns >> 6), np.uint64(1) << (columns & 63).astype(np.uint64))
+
+        self.categories = {}
+        for source, target in zip(*(a.tolist() for a in snapshot.out_edges(self.professions, ["BELONGS_TO"])[:2])):
+            self.categories.setdefault(source, snapshot.properties[target].get("name"))
+
+    def resolve(self, requested):
+        """Колонки запрошенных элементов и список имен, которых нет в каталоге."""
+        columns = []
+        unknown = {kind: [] for kind in MATCH_KINDS}
+        for kind in MATCH_KINDS:
+            for name in requested.get(kind, []):
+                column = self.columns[kind].get(name.lower())
+                if column is None:
+                    unknown[kind].append(name)
+                else:
+                    columns.append(column)
+        return sorted(set(columns)), unknown
+
+    def match(self, columns, limit):
+        query_bits = np.zeros(self.width, dtype=bool)
+        query_bits[columns] = True
+        query = pack_bits(query_bits[None, :])
+
+        # Покрытие всех профессий сразу: popcount(профессия AND запрос) по словам
+        covered = np.bitwise_count(self.bitsets & query).sum(axis=1)
+        total = len(columns)
+        # Больше покрытых элементов - выше, при равенстве - по имени профессии
+        order = np.lexsort((self.snapshot.rank[self.professions], -covered))
+        order = order[covered[order] > 0][:limit]
+
+        results = []
+        for row in order.tolist():
+            missing_words = query[0] & ~self.bitsets[row]
+            missing_bits = np.unpackbits(missing_words.view(np.uint8), bitorder="little")[:self.width]
+            missing = {kind: [] for kind in MATCH_KINDS}
+            for column in np.flatnonzero(missing_bits).tolist():
+                missing[self.kinds[column]].append(self.snapshot.properties[self.features[column]].get("name"))
+            results.append((int(self.professions[row]), int(covered[row]), int(covered[row]) / total, missing))
+        return results
+
+
+_matcher = None
+_lock = asyncio.Lock()
+
+
+async def get_matcher(snapshot):
+    """Битовые множества для снимка графа; пересчитываются один раз на версию каталога."""
+    global _matcher
+    matcher = _matcher
+    if matcher is not None and matcher.snapshot is snapshot:
+        return matcher
+    async with _lock:
+        if _matcher is None or _matcher.snapshot is not snapshot:
+            _matcher = await run_in_threadpool(Matcher, snapshot)
+        return _matcher
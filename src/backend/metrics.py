@@ -0,0 +1,131 @@
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+)
+from starlette.responses import Response
+from starlette.routing import Match
+import slow_queries
+
+# При запуске под gunicorn entrypoint.sh задает PROMETHEUS_MULTIPROC_DIR: каждый воркер пишет
+# свои значения в файлы этой папки, а /metrics любого воркера собирает их вместе
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+REQUEST_COUNT = Counter(
+    "http_requests_total", "HTTP requests by status", ["method", "route", "status"]
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "HTTP response body size", ["method", "route"], buckets=SIZE_BUCKETS
+)
+QUERY_AVAILABLE = Histogram(
+    "neo4j_query_result_available_seconds", "Time until the first record was available", ["query"],
+    buckets=LATENCY_BUCKETS
+)
+QUERY_CONSUMED = Histogram(
+    "neo4j_query_result_consumed_seconds", "Time to consume all records after they became available", ["query"],
+    buckets=LATENCY_BUCKETS
+)
+QUERY_COUNT = Counter(
+    "neo4j_queries_total", "Cypher queries by name", ["query"]
+)
+
+
+def route_name(request):
+    # Шаблон пути, а не сам путь: иначе каждое имя профессии станет отдельной серией
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    # Ответ без маршрутизации (304 из conditional_get и т. п.): шаблон ищется по таблице маршрутов
+    partial = None
+    for route in getattr(request.app, "routes", ()):
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+async def track_requests(request, call_next):
+    """Middleware: задержка, статус и размер ответа по маршрутам."""
+    start = time.perf_counter()
+    slow_queries.current_scope.set(request.scope)
+    response = None
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = route_name(request)
+        REQUEST_LATENCY.labels(request.method, route).observe(time.perf_counter() - start)
+        REQUEST_COUNT.labels(request.method, route, str(status)).inc()
+        # У потоковых ответов (экспорт) размер заранее неизвестен
+        if response is not None and "content-length" in response.headers:
+            RESPONSE_SIZE.labels(request.method, route).observe(int(response.headers["content-length"]))
+
+
+def metrics_response():
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+
+
+class TimedResult:
+    """Обертка над AsyncResult: после чтения всех записей учитывает тайминги из ResultSummary
+    и передает медленные запросы в журнал slow_queries."""
+
+    def __init__(self, name, query, parameters, result, started):
+        self.name = name
+        self._query = query
+        self._parameters = parameters
+        self._result = result
+        self._started = started
+        self._rows = 0
+        self._observed = False
+
+    async def _observe(self):
+        if self._observed:
+            return self._summary
+        self._observed = True
+        self._summary = await self._result.consume()
+        QUERY_COUNT.labels(self.name).inc()
+        if self._summary.result_available_after is not None:
+            QUERY_AVAILABLE.labels(self.name).observe(self._summary.result_available_after / 1000)
+        if self._summary.result_consumed_after is not None:
+            QUERY_CONSUMED.labels(self.name).observe(self._summary.result_consumed_after / 1000)
+        elapsed_ms = (time.perf_counter() - self._started) * 1000
+        slow_queries.record(self.name, self._query, self._parameters, elapsed_ms, self._rows, self._summary)
+        return self._summary
+
+    async def __aiter__(self):
+        async for record in self._result:
+            self._rows += 1
+            yield record
+        await self._observe()
+
+    async def single(self):
+        record = await self._result.single()
+        self._rows = int(record is not None)
+        await self._observe()
+        return record
+
+    async def consume(self):
+        return await self._observe()
+
+
+async def run_query(runner, name, query, parameters=None, **kwargs):
+    """Выполняет запрос в сессии или транзакции runner; name - метка запроса в метриках и журнале."""
+    parameters = {**(parameters or {}), **kwargs}
+    started = time.perf_counter()
+    result = await runner.run(query, parameters)
+    return TimedResult(name, query, parameters, result, started)
@@ -0,0 +1,75 @@
+import asyncio
+from collections import defaultdict
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from graph_snapshot import get_snapshot
+from catalog import get_catalog_version, fetch_catalog_version
+from utils import CATALOG_LABELS
+
+# Форма редактирования группы может ссылаться на всех ее участников сразу
+MAX_NAMES_BATCH_SIZE = 2000
+
+
+class NamesRequest(BaseModel):
+    names: list[str] = Field(default=[], max_length=MAX_NAMES_BATCH_SIZE)
+    label: str | None = None
+
+
+class NameIndex:
+    """Имя узла без учета регистра -> [(метка, id)] для одного снимка графа.
+
+    Сравнение как в check_node_exists (toLower), поэтому имя, которое нельзя
+    добавить повторно, здесь всегда находится. При совпадении имен в разных
+    метках первой идет метка, стоящая раньше в CATALOG_LABELS.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.entries = defaultdict(list)
+        order = {label: i for i, label in enumerate(CATALOG_LABELS)}
+        for node, properties in enumerate(snapshot.properties):
+            name = properties.get("name")
+            label = snapshot.label_names[snapshot.labels[node]]
+            if name is None or label not in order:
+                continue
+            self.entries[str(name).lower()].append((label, properties.get("id")))
+        for entries in self.entries.values():
+            entries.sort(key=lambda entry: order[entry[0]])
+
+    def lookup(self, name, label=None):
+        for entry_label, node_id in self.entries.get(name.lower(), ()):
+            if label is None or entry_label == label:
+                return {"id": node_id, "label": entry_label}
+        return None
+
+
+_index = None
+_lock = asyncio.Lock()
+
+
+async def get_name_index(snapshot):
+    """Словарь имен для снимка графа; пересчитывается один раз на версию каталога."""
+    global _index
+    index = _index
+    if index is not None and index.snapshot is snapshot:
+        return index
+    async with _lock:
+        if _index is None or _index.snapshot is not snapshot:
+            _index = await run_in_threadpool(NameIndex, snapshot)
+        return _index
+
+
+async def resolve_names(driver, names, label=None):
+    """{имя: {"id", "label"} или None} для всех имен одним проходом по словарю.
+
+    Если часть имен не нашлась, версия каталога перечитывается (с закладкой клиента):
+    запись из другого воркера могла еще не дойти до этого по опросу версии.
+    """
+    index = await get_name_index(await get_snapshot(driver))
+    resolved = {name: index.lookup(name, label) for name in names}
+    if None in resolved.values():
+        version = get_catalog_version()
+        if await fetch_catalog_version(driver) != version:
+            index = await get_name_index(await get_snapshot(driver))
+            resolved = {name: index.lookup(name, label) for name in names}
+    return resolved
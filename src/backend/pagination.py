@@ -0,0 +1,102 @@
+import base64
+import binascii
+import json
+import re
+from fastapi import HTTPException, Query
+
+MAX_PAGE_SIZE = 500
+
+# Ключ вида x.name_lower - свойство узла, по которому есть индекс
+PROPERTY_KEY = re.compile(r"^\w+\.\w+$")
+
+# Параметры, которые добавляются ко всем маршрутам списков, фильтров и поиска
+PageLimit = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables keyset pagination")
+PageCursor = Query(None, description="Opaque cursor returned as next_cursor by the previous page")
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+class Page:
+    """Keyset-пагинация: запрос продолжается строго после ключа сортировки последней строки.
+
+    sort_keys - выражения Cypher в порядке сортировки, последним идет уникальный id.
+    Все ключи сортируются по возрастанию (для убывания используется, например, -score).
+    Без limit запрос и ответ остаются прежними - полный список.
+
+    Если первый ключ - индексированное свойство (x.name_lower), условие начинается с
+    диапазона по нему (x.name_lower >= $after[0], на первой странице - IS NOT NULL), а
+    запрос сортирует по ключам по отдельности ({order_by}): планировщик ищет начало
+    страницы по индексу и читает его по порядку, а не сортирует всю метку.
+    """
+
+    def __init__(self, limit, cursor, sort_keys):
+        self.limit = limit
+        self.sort_keys = sort_keys
+        self.after = decode_cursor(cursor, len(sort_keys)) if cursor and limit else None
+        self._keys = []
+
+    @property
+    def sort_key(self):
+        return "[" + ", ".join(self.sort_keys) + "]"
+
+    @property
+    def order_by(self):
+        return ", ".join(self.sort_keys)
+
+    @property
+    def condition(self):
+        lead = self.sort_keys[0]
+        seekable = self.limit and PROPERTY_KEY.match(lead)
+        if self.after is None:
+            return f"{lead} IS NOT NULL" if seekable else "true"
+        clauses = []
+        for i, expression in enumerate(self.sort_keys):
+            parts = [f"{self.sort_keys[j]} = $after[{j}]" for j in range(i)]
+            parts.append(f"{expression} > $after[{i}]")
+            clauses.append("(" + " AND ".join(parts) + ")")
+        condition = "(" + " OR ".join(clauses) + ")"
+        # Тот же порядок в виде диапазона по первому ключу - его планировщик превращает в поиск по индексу
+        return f"({lead} >= $after[0] AND {condition})" if seekable else condition
+
+    @property
+    def limit_clause(self):
+        return "LIMIT $page_limit" if self.limit else ""
+
+    @property
+    def template(self):
+        # Подстановки для зарегистрированных запросов (queries.register)
+        return {
+            "condition": self.condition, "sort_key": self.sort_key,
+            "order_by": self.order_by, "limit_clause": self.limit_clause,
+        }
+
+    @property
+    def params(self):
+        # Запрашиваем на одну строку больше, чтобы узнать, есть ли следующая страница
+        return {"after": self.after, "page_limit": self.limit + 1 if self.limit else None}
+
+    def track(self, sort_key):
+        if self.limit and len(self._keys) < self.limit:
+            self._keys.append(sort_key)
+
+    def result(self, items):
+        if not self.limit:
+            return items
+        next_cursor = None
+        if len(items) > self.limit:
+            items = items[:self.limit]
+            next_cursor = encode_cursor(self._keys[-1])
+        return {"items": items, "next_cursor": next_cursor}
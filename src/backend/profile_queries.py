@@ -0,0 +1,238 @@
+"""Проверка запросов маршрутов под PROFILE на локальной базе.
+
+Каждый зарегистрированный запрос (queries.QUERIES) выполняется с PROFILE на образце
+данных из базы: подстановки - как в маршруте (первая страница списка), параметры -
+самые связанные узлы и слова из их имен. Если суммарные db hits или число строк на
+любом операторе плана превышают бюджет из QUERY_SAMPLES, скрипт печатает план и
+завершается с кодом 1. Запрос без записи в QUERY_SAMPLES или без образца данных в базе
+(пропущенный, SKIP) тоже считается ошибкой - в том числе при --calibrate.
+
+Бюджеты рассчитаны на базу, заполненную из db.json (init_data.py). После изменения
+запросов или данных их можно пересчитать: с ключом --calibrate скрипт печатает
+измеренные значения с двукратным запасом вместо проверки.
+
+    NEO4J_URI=bolt://localhost:7687 NEO4J_USER=neo4j NEO4J_PASSWORD=... python profile_queries.py [--calibrate]
+"""
+import math
+import os
+import sys
+from neo4j import GraphDatabase
+from pagination import Page
+from queries import QUERIES, render
+from utils import fulltext_query
+# Импорт маршрутов регистрирует их запросы в QUERIES
+import routes.api_groups  # noqa: F401
+import routes.api_search  # noqa: F401
+from routes.api_professions import PROFESSION_BATCH_BODY
+from routes.api_skills import SKILL_BATCH_BODY
+from routes.api_technologies import TECHNOLOGY_BATCH_BODY
+from routes.api_tools import TOOL_BATCH_BODY
+
+NEO4J_URI = os.getenv("NEO4J_URI")
+NEO4J_USER = os.getenv("NEO4J_USER")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+# Размер страницы, с которым профилируются списки
+PROFILE_PAGE_SIZE = 50
+# Сколько имен передается в пакетные запросы
+PROFILE_BATCH_SIZE = 20
+
+
+def top_name(label):
+    # Самый связанный узел метки - худший случай для детальных запросов и фильтров
+    return f"MATCH (n:{label}) RETURN n.name AS value ORDER BY COUNT {{ (n)--() }} DESC LIMIT 1"
+
+
+def top_word(label):
+    # Первое слово имени самого связанного узла - образец поисковой строки
+    return f"MATCH (n:{label}) RETURN split(n.name, ' ')[0] AS value ORDER BY COUNT {{ (n)--() }} DESC LIMIT 1"
+
+
+def top_names(label):
+    return (f"MATCH (n:{label}) WITH n ORDER BY COUNT {{ (n)--() }} DESC LIMIT {PROFILE_BATCH_SIZE} "
+            "RETURN collect(n.name) AS value")
+
+
+def case(budget, params=None, sort_keys=None, **template):
+    """Образец для одного запроса: подстановки, функция параметров и бюджет (db hits, строк на операторе).
+
+    params получает value(запрос) - первое значение образца из базы - и возвращает параметры.
+    sort_keys - ключи Page маршрута: запрос профилируется на первой странице.
+    """
+    page = Page(PROFILE_PAGE_SIZE, None, sort_keys) if sort_keys else None
+    if page is not None:
+        template = {**page.template, **template}
+
+    def resolve(value):
+        return {**(page.params if page else {}), **(params(value) if params else {})}
+
+    return template, resolve, budget
+
+
+def by_name(param, label):
+    return lambda value: {param: value(top_name(label))}
+
+
+def search(label, field):
+    def params(value):
+        term = value(top_word(label))
+        query = fulltext_query(term, field)
+        if query is None:
+            raise LookupError(term)
+        return {"search_term": query, "phrase": term}
+    return params
+
+
+def search_catalog(value):
+    term = value(top_word("Technology"))
+    if fulltext_query(term, "name") is None:
+        raise LookupError(term)
+    # Как в маршруте: совпадения в названии весят вдвое больше совпадений в описании
+    query = f"({fulltext_query(term, 'name')})^2 OR ({fulltext_query(term, 'description')})"
+    return {"search_query": query, "phrase": term, "limit": 20}
+
+
+def batch(label):
+    return lambda value: {"names": value(top_names(label)), "ids": []}
+
+
+def listing(variable, group=None):
+    keys = [f"{variable}.name_lower", f"{variable}.id"]
+    return [f"{group}.name_lower"] + keys if group else keys
+
+
+def scored(variable):
+    return ["-score"] + listing(variable)
+
+
+# Имя зарегистрированного запроса -> образец или список образцов (case)
+QUERY_SAMPLES = {
+    "catalog.fetch_catalog_version": case((20, 5)),
+    "batch.run_batch": [
+        case((3000, 200), batch("Profession"), label="Profession", body=PROFESSION_BATCH_BODY),
+        case((1500, 200), batch("Skill"), label="Skill", body=SKILL_BATCH_BODY),
+        case((1500, 200), batch("Technology"), label="Technology", body=TECHNOLOGY_BATCH_BODY),
+        case((1500, 200), batch("Tool"), label="Tool", body=TOOL_BATCH_BODY),
+    ],
+
+    "professions.get_profession": case((500, 100), by_name("profession_name", "Profession")),
+    "professions.get_professions": case((300, 50), sort_keys=listing("p")),
+    "professions.get_professions_sorted_by_categories": case((300, 50), sort_keys=listing("p", "c")),
+    "professions.get_professions_filtered_by_category": case((200, 50), by_name("name", "Category"),
+                                                             sort_keys=listing("p")),
+    "professions.get_professions_filtered_by_skill": case((200, 50), by_name("name", "Skill"),
+                                                          sort_keys=listing("p")),
+    "professions.get_professions_filtered_by_technology": case((200, 50), by_name("name", "Technology"),
+                                                               sort_keys=listing("p")),
+    "professions.get_professions_filtered_by_tool": case((200, 50), by_name("name", "Tool"),
+                                                         sort_keys=listing("p")),
+    "professions.search_professions_by_name": case((300, 50), search("Profession", "name"),
+                                                   sort_keys=scored("p")),
+
+    "skills.get_skill": case((300, 100), by_name("skill_name", "Skill")),
+    "skills.get_skills": case((600, 100), sort_keys=listing("s")),
+    "skills.get_skills_sorted_by_skillgroups": case((800, 100), sort_keys=listing("s", "g")),
+    "skills.get_skills_filtered_by_skillgroup": case((600, 100), by_name("name", "SkillGroup"),
+                                                     sort_keys=listing("s")),
+    "skills.search_skills_by_name": case((600, 100), search("Skill", "name"), sort_keys=scored("s")),
+
+    "technologies.get_technology": case((300, 100), by_name("technology_name", "Technology")),
+    "technologies.get_technologies": case((800, 150), sort_keys=listing("t")),
+    "technologies.get_technologies_sorted_by_technologygroups": case((1000, 150), sort_keys=listing("t", "g")),
+    "technologies.get_technologies_filtered_by_technologygroup": case((300, 50), by_name("name", "TechnologyGroup"),
+                                                                      sort_keys=listing("t")),
+    "technologies.search_technologies_by_name": case((800, 150), search("Technology", "name"),
+                                                     sort_keys=scored("t")),
+    "technologies.search_technologies_by_description": case((800, 150), search("Technology", "description"),
+                                                            sort_keys=scored("t")),
+
+    "tools.get_tool": case((300, 100), by_name("tool_name", "Tool")),
+    "tools.get_tools": case((1000, 200), sort_keys=listing("t")),
+    "tools.get_tools_sorted_by_toolgroups": case((1200, 200), sort_keys=listing("t", "g")),
+    "tools.get_tools_filtered_by_toolgroup": case((300, 50), by_name("name", "ToolGroup"), sort_keys=listing("t")),
+    "tools.search_tools_by_name": case((1000, 200), search("Tool", "name"), sort_keys=scored("t")),
+    "tools.search_tools_by_description": case((1000, 200), search("Tool", "description"), sort_keys=scored("t")),
+
+    "groups.get_group_name": case((500, 100), by_name("name", "SkillGroup")),
+    "groups.get_groups": case((300, 50), sort_keys=listing("g"), label="TechnologyGroup"),
+    "groups.search_group_type_by_name": case((300, 50), search("TechnologyGroup", "name"),
+                                             sort_keys=scored("g"), label="TechnologyGroup"),
+    "groups.search_group_type_by_description": case((300, 50), search("TechnologyGroup", "description"),
+                                                    sort_keys=scored("g"), label="TechnologyGroup"),
+
+    "search.search_catalog": case((2000, 300), search_catalog),
+}
+
+
+def walk_plan(plan, depth=0):
+    yield depth, plan
+    for child in plan.get("children", []):
+        yield from walk_plan(child, depth + 1)
+
+
+def profile_query(session, query, params):
+    result = session.run("PROFILE " + query, params)
+    summary = result.consume()
+    operators = list(walk_plan(summary.profile))
+    db_hits = sum(op.get("dbHits", 0) for _, op in operators)
+    max_rows = max((op.get("rows", 0) for _, op in operators), default=0)
+    return db_hits, max_rows, operators
+
+
+def print_plan(operators):
+    for depth, op in operators:
+        name = op.get("operatorType", "?")
+        print(f"    {'  ' * depth}{name}: rows={op.get('rows', 0)} dbHits={op.get('dbHits', 0)}")
+
+
+def headroom(value):
+    # Двойной запас, округленный вверх до 50
+    return max(50, math.ceil(value * 2 / 50) * 50)
+
+
+def main(calibrate=False):
+    failed = []
+    skipped = []
+    with GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD)) as driver:
+        with driver.session() as session:
+
+            def value(sample_query):
+                record = session.run(sample_query).single()
+                if record is None or not record["value"]:
+                    raise LookupError(sample_query)
+                return record["value"]
+
+            for name in QUERIES:
+                cases = QUERY_SAMPLES.get(name)
+                if cases is None:
+                    print(f"FAIL {name}: no profiling sample in QUERY_SAMPLES")
+                    failed.append(name)
+                    continue
+                for template, resolve, (max_db_hits, max_rows) in cases if isinstance(cases, list) else [cases]:
+                    title = f"{name}[{template['label']}]" if "label" in template else name
+                    try:
+                        params = resolve(value)
+                    except LookupError:
+                        print(f"SKIP {title}: no sample data")
+                        skipped.append(title)
+                        continue
+                    db_hits, rows, operators = profile_query(session, render(name, template), params)
+                    if calibrate:
+                        print(f"{title}: dbHits={db_hits} rows={rows} -> ({headroom(db_hits)}, {headroom(rows)})")
+                        continue
+                    ok = db_hits <= max_db_hits and rows <= max_rows
+                    print(f"{'OK  ' if ok else 'FAIL'} {title}: dbHits={db_hits}/{max_db_hits} rows={rows}/{max_rows}")
+                    if not ok:
+                        print_plan(operators)
+                        failed.append(title)
+
+    if failed:
+        print(f"Over budget: {', '.join(failed)}")
+    if skipped:
+        print(f"Not profiled: {', '.join(skipped)}")
+    if failed or skipped:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(calibrate="--calibrate" in sys.argv[1:])
@@ -0,0 +1,166 @@
+"""Реестр запросов Cypher и маршрутизация чтения и записи.
+
+Каждый запрос регистрируется один раз под именем "<модуль>.<функция>", тем же, что
+используется в метриках и журнале медленных запросов. Чтения выполняются через
+execute_read в сессии READ_ACCESS, поэтому в кластере уходят на реплики; записи идут
+через write_session.
+
+Причинная согласованность: после записи ответ несет закладку Neo4j в заголовке
+X-Neo4j-Bookmark. Клиент возвращает ее в том же заголовке, и следующие запросы
+(чтение на любой реплике) ждут, пока эта запись до нее дойдет. Воркер перечитывает
+версию каталога по каждой закладке один раз и подтверждает это заголовком
+X-Neo4j-Bookmark-Applied; после подтверждения клиент закладку больше не отправляет.
+"""
+import asyncio
+import os
+import re
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from neo4j import AsyncGraphDatabase, READ_ACCESS, WRITE_ACCESS
+from neo4j.exceptions import Neo4jError
+from metrics import run_query
+
+BOOKMARK_HEADER = "X-Neo4j-Bookmark"
+# Закладки Neo4j непрозрачны, но состоят из букв, цифр и ":+/=_-"; остальное считаем мусором
+BOOKMARK_PATTERN = re.compile(r"^[A-Za-z0-9:+/=_.-]{1,512}$")
+MAX_BOOKMARKS = 16
+BOOKMARK_APPLIED_HEADER = "X-Neo4j-Bookmark-Applied"
+# Сколько уже учтенных закладок помнит воркер
+APPLIED_BOOKMARKS_SIZE = 1024
+# Сколько ждать перечитывания версии по закладке, прежде чем обработать запрос без него
+BOOKMARK_REFRESH_TIMEOUT = float(os.getenv("BOOKMARK_REFRESH_TIMEOUT", "2"))
+
+QUERIES = {}
+
+# Состояние текущего HTTP-запроса: менеджер закладок и признак того, что была запись
+_request_state = ContextVar("request_state", default=None)
+
+_bookmark_hooks = []
+# Закладки, с учетом которых этот воркер уже перечитал версию каталога (или сам их получил после
+# записи): локальная версия только растет, поэтому повторно идти за ней в Neo4j не нужно
+_applied_bookmarks = OrderedDict()
+
+
+def register(name, cypher):
+    """Регистрирует запрос и возвращает его имя.
+
+    Запрос с подстановками ({condition}, {label} и т. п.) форматируется при выполнении
+    через str.format, поэтому фигурные скобки Cypher в нем удваиваются.
+    """
+    if name in QUERIES:
+        raise ValueError(f"Query {name} is already registered")
+    QUERIES[name] = cypher
+    return name
+
+
+def on_client_bookmark(callback):
+    """Регистрирует async callback(), который вызывается до обработки запроса с закладкой клиента.
+
+    Так версия каталога перечитывается с учетом закладки раньше, чем кеш ответов,
+    ответ 304 или снимок графа решат, что локальные данные свежие.
+    """
+    _bookmark_hooks.append(callback)
+    return callback
+
+
+def render(name, template):
+    query = QUERIES[name]
+    return query.format(**template) if template else query
+
+
+def bookmark_manager():
+    """Менеджер закладок текущего HTTP-запроса; вне запроса - None."""
+    state = _request_state.get()
+    return state["manager"] if state else None
+
+
+async def read(driver, name, parameters=None, **template):
+    """Выполняет зарегистрированный запрос на чтение и возвращает список записей."""
+    query = render(name, template)
+
+    async def work(tx):
+        result = await run_query(tx, name, query, parameters)
+        return [record async for record in result]
+
+    async with driver.session(default_access_mode=READ_ACCESS, bookmark_manager=bookmark_manager()) as session:
+        return await session.execute_read(work)
+
+
+async def read_one(driver, name, parameters=None, **template):
+    records = await read(driver, name, parameters, **template)
+    return records[0] if records else None
+
+
+@asynccontextmanager
+async def write_session(driver):
+    """Сессия для записи; ее закладка попадет в ответ текущего HTTP-запроса."""
+    state = _request_state.get()
+    if state is not None:
+        state["written"] = True
+    async with driver.session(default_access_mode=WRITE_ACCESS, bookmark_manager=bookmark_manager()) as session:
+        yield session
+
+
+def parse_bookmarks(value):
+    """Закладки из заголовка; некорректный заголовок равносилен его отсутствию."""
+    bookmarks = [bookmark.strip() for bookmark in value.split(",") if bookmark.strip()] if value else []
+    if len(bookmarks) > MAX_BOOKMARKS or not all(BOOKMARK_PATTERN.match(bookmark) for bookmark in bookmarks):
+        return []
+    return bookmarks
+
+
+def _invalid_bookmark(error):
+    return "Bookmark" in (getattr(error, "code", None) or "")
+
+
+def _remember_applied(bookmarks):
+    for bookmark in bookmarks:
+        _applied_bookmarks[bookmark] = True
+        _applied_bookmarks.move_to_end(bookmark)
+    while len(_applied_bookmarks) > APPLIED_BOOKMARKS_SIZE:
+        _applied_bookmarks.popitem(last=False)
+
+
+async def _apply_bookmarks(state, bookmarks):
+    """Вызывает обработчики on_client_bookmark; True, если версия перечитана с учетом закладок."""
+    try:
+        for hook in _bookmark_hooks:
+            await asyncio.wait_for(hook(), BOOKMARK_REFRESH_TIMEOUT)
+    except Neo4jError as e:
+        if not _invalid_bookmark(e):
+            print(f"Failed to refresh catalog version for bookmark: {e}")
+        else:
+            # Сервер не принял закладку (чужая база, испорченное значение) - работаем без нее
+            state["manager"] = AsyncGraphDatabase.bookmark_manager()
+        return False
+    except Exception as e:
+        print(f"Failed to refresh catalog version for bookmark: {e!r}")
+        return False
+    _remember_applied(bookmarks)
+    return True
+
+
+async def track_bookmarks(request, call_next):
+    """Middleware: принимает закладку клиента и возвращает новую после записи."""
+    incoming = parse_bookmarks(request.headers.get(BOOKMARK_HEADER))
+    state = {
+        "manager": AsyncGraphDatabase.bookmark_manager(initial_bookmarks=incoming),
+        "written": False,
+    }
+    _request_state.set(state)
+    applied = False
+    if incoming:
+        applied = all(bookmark in _applied_bookmarks for bookmark in incoming)
+        if not applied:
+            applied = await _apply_bookmarks(state, incoming)
+    response = await call_next(request)
+    if applied:
+        response.headers[BOOKMARK_APPLIED_HEADER] = ",".join(incoming)
+    if state["written"]:
+        bookmarks = await state["manager"].get_bookmarks()
+        if bookmarks:
+            # Запись прошла через этот воркер, и он уже поднял свою версию каталога
+            _remember_applied(bookmarks)
+            response.headers[BOOKMARK_HEADER] = ",".join(sorted(bookmarks))
+    return response
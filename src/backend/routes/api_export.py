@@ -1,73 +1,139 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Response
-from database import driver, check_database_empty
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from neo4j import READ_ACCESS
+from database import driver
 from pathlib import Path
-from io import BytesIO
 import zipfile
 import json
+from metrics import run_query
+from queries import bookmark_manager
+from utils import NAME_KEY
 
 
 router = APIRouter(prefix="/api", tags=["export"])
 
+# Порог, после которого накопленные байты архива отдаются клиенту, и размер блока чтения изображений
+EXPORT_FLUSH_SIZE = 64 * 1024
+IMAGE_READ_CHUNK_SIZE = 64 * 1024
 
-def export_to_json(driver):
-    filename = "it_catalog.json"
-    result = {"nodes": [], "relationships": []}
-
-    with driver.session() as session:
-        nodes = session.execute_read(lambda tx:
-                                     list(tx.run("MATCH (n) RETURN labels(n) AS labels, properties(n) AS properties")))
-        for record in nodes:
-            props = dict(record["properties"])
-            props.pop("time", None)
-            
-            result["nodes"].append({
-                "label": record["labels"][0],
-                "properties": props
-            })
-            
-
-        relationships = session.execute_read(lambda tx:
-                                             list(tx.run(
-                                                 "MATCH (s)-[r]->(e) RETURN type(r) AS type, s.id AS startNode, e.id AS endNode")))
-        for record in relationships:
-            result["relationships"].append({
-                "type": record["type"],
-                "startNode": record["startNode"],
-                "endNode": record["endNode"]
-            })
-    return result
+
+class ZipStream:
+    """Несматываемый приемник для ZipFile: копит записанные байты до следующего drain()."""
+
+    def __init__(self):
+        self._chunks = []
+        self.size = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self.size = 0
+        return data
+
+
+async def iter_export_json(driver):
+    """Отдает data.json по частям по мере того, как курсор Neo4j выдает записи."""
+    async with driver.session(default_access_mode=READ_ACCESS, bookmark_manager=bookmark_manager()) as session:
+        async with await session.begin_transaction() as tx:
+            yield '{\n  "nodes": ['
+            separator = "\n    "
+            result = await run_query(tx, "export.nodes", "MATCH (n) WHERE NOT n:CatalogVersion RETURN labels(n) AS labels, properties(n) AS properties")
+            async for record in result:
+                props = dict(record["properties"])
+                props.pop("time", None)
+                props.pop(NAME_KEY, None)
+
+                node = {
+                    "label": record["labels"][0],
+                    "properties": props
+                }
+                yield separator + json.dumps(node, ensure_ascii=False)
+                separator = ",\n    "
+
+            yield '\n  ],\n  "relationships": ['
+            separator = "\n    "
+            result = await run_query(tx, "export.relationships", "MATCH (s)-[r]->(e) RETURN type(r) AS type, s.id AS startNode, e.id AS endNode")
+            async for record in result:
+                relationship = {
+                    "type": record["type"],
+                    "startNode": record["startNode"],
+                    "endNode": record["endNode"]
+                }
+                yield separator + json.dumps(relationship, ensure_ascii=False)
+                separator = ",\n    "
+            yield "\n  ]\n}\n"
+
+
+def iter_image_files(images_dir):
+    for img_path in images_dir.rglob("*"):
+        if img_path.is_file():
+            yield img_path
+
+
+def copy_image_chunk(src, dst):
+    """Читает и сжимает один блок изображения; возвращает False, когда файл закончился."""
+    chunk = src.read(IMAGE_READ_CHUNK_SIZE)
+    dst.write(chunk)
+    return bool(chunk)
+
+
+async def stream_export_zip(images_dir):
+    # Сжатие и чтение файлов блокируют, поэтому каждый шаг выполняется в пуле потоков,
+    # а между шагами накопленные байты отдаются клиенту
+    sink = ZipStream()
+
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        # Размер data.json заранее неизвестен, поэтому сразу включаем ZIP64
+        with zip_file.open("data.json", "w", force_zip64=True) as data_file:
+            pieces = []
+            size = 0
+            async for piece in iter_export_json(driver):
+                pieces.append(piece.encode("utf-8"))
+                size += len(pieces[-1])
+                if size >= EXPORT_FLUSH_SIZE:
+                    await run_in_threadpool(data_file.write, b"".join(pieces))
+                    pieces.clear()
+                    size = 0
+                    if sink.size >= EXPORT_FLUSH_SIZE:
+                        yield sink.drain()
+            await run_in_threadpool(data_file.write, b"".join(pieces))
+        yield sink.drain()
+
+        images = iter_image_files(images_dir)
+        while (img_path := await run_in_threadpool(next, images, None)) is not None:
+            arcname = str(img_path.relative_to(images_dir.parent))
+            src = await run_in_threadpool(open, img_path, "rb")
+            try:
+                with zip_file.open(arcname, "w") as dst:
+                    while await run_in_threadpool(copy_image_chunk, src, dst):
+                        if sink.size >= EXPORT_FLUSH_SIZE:
+                            yield sink.drain()
+            finally:
+                await run_in_threadpool(src.close)
+            yield sink.drain()
+
+    # Центральный каталог архива записывается при закрытии ZipFile
+    yield sink.drain()
 
 
 @router.get("/export")
 async def export_data():
-    try:
-        data = export_to_json(driver)
-        json_data = json.dumps(data, ensure_ascii=False, indent=2)
-        
-        images_dir = Path("static/images")
-        
-        if not images_dir.exists():
-            raise HTTPException(status_code=404, detail="Images directory not found")
-        
-        zip_buffer = BytesIO()
-        
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            zip_file.writestr("data.json", json_data)
-
-            for img_path in images_dir.rglob("*"):
-                if img_path.is_file():
-                    arcname = str(img_path.relative_to(images_dir.parent))
-                    zip_file.write(img_path, arcname=arcname)
-
-        zip_buffer.seek(0)
-
-        return Response(
-            content=zip_buffer.getvalue(),
-            media_type="application/zip",
-            headers={"Content-Disposition": "attachment; filename=export.zip"}
-        )
-    
-    except HTTPException as he:
-        raise he
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    images_dir = Path("static/images")
+
+    if not images_dir.exists():
+        raise HTTPException(status_code=404, detail="Images directory not found")
+
+    return StreamingResponse(
+        stream_export_zip(images_dir),
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=export.zip"}
+    )
@@ -1,101 +1,216 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response
 from database import driver
+from utils import RELATIONSHIP_LABELS
+from graph_snapshot import get_snapshot
+from layout import get_layout, LAYOUT_MAX_NODES
+import numpy as np
+import msgpack
 
 router = APIRouter(prefix="/api/graph", tags=["graph"])
 
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Поля узлов, которые попадают в компактный ответ, если fields не указан
+DEFAULT_COMPACT_FIELDS = ["name"]
+
+GRAPH_FORMATS = Query("full", pattern="^(full|compact)$",
+                      description="full - list of node objects, compact - columnar arrays")
+GRAPH_FIELDS = Query(None, description="Comma-separated node properties for the compact format")
+GRAPH_LAYOUT = Query(False, description="Include server-side layout coordinates x, y for every node")
+
+MAX_NEIGHBORHOOD_DEPTH = 5
+MAX_NEIGHBORHOOD_NODES = 2000
+
+
+def wants_msgpack(request):
+    return MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def select_nodes(snapshot, indices):
+    return {snapshot.keys[i]: snapshot.records[i] for i in indices.tolist()}
+
+
+async def with_layout(snapshot, nodes):
+    if snapshot.node_count > LAYOUT_MAX_NODES:
+        raise HTTPException(status_code=422, detail=f"Layout is limited to graphs of {LAYOUT_MAX_NODES} nodes")
+    # Записи снимка общие для всех запросов, поэтому координаты добавляются в копии
+    coordinates = (await get_layout(snapshot)).coordinates()
+    return {
+        key: {**node, "x": coordinates[key][0], "y": coordinates[key][1]}
+        for key, node in nodes.items()
+    }
+
+
+def compact_graph(nodes, links, fields, layout=False):
+    """Колоночное представление: параллельные массивы узлов, метки и типы связей словарем,
+    связи - пары индексов в массиве узлов."""
+    labels = []
+    label_index = {}
+    columns = {"id": [], "label": []}
+    columns.update({field: [] for field in fields})
+    if layout:
+        columns.update({"x": [], "y": []})
+    position = {}
+
+    for i, (key, node) in enumerate(nodes.items()):
+        position[key] = i
+        label = node["label"]
+        if label not in label_index:
+            label_index[label] = len(labels)
+            labels.append(label)
+        columns["id"].append(key)
+        columns["label"].append(label_index[label])
+        for field in fields:
+            columns[field].append(node["properties"].get(field))
+        if layout:
+            columns["x"].append(node["x"])
+            columns["y"].append(node["y"])
+
+    types = []
+    type_index = {}
+    link_columns = {"source": [], "target": [], "type": []}
+    for link in links:
+        if link["type"] not in type_index:
+            type_index[link["type"]] = len(types)
+            types.append(link["type"])
+        link_columns["source"].append(position[link["source"]])
+        link_columns["target"].append(position[link["target"]])
+        link_columns["type"].append(type_index[link["type"]])
+
+    return {
+        "labels": labels,
+        "types": types,
+        "fields": list(columns),
+        "nodes": columns,
+        "links": link_columns
+    }
+
+
+def graph_response(request, nodes, links, format, fields, layout=False, extra=None):
+    # Бинарная кодировка всегда колоночная: клиент, который умеет MessagePack, умеет и ее
+    binary = wants_msgpack(request)
+    if format == "compact" or binary:
+        field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else DEFAULT_COMPACT_FIELDS
+        field_list = [f for f in dict.fromkeys(field_list) if f not in ("id", "label", "x", "y")]
+        data = compact_graph(nodes, links, field_list, layout)
+    else:
+        data = {"nodes": list(nodes.values()), "links": links}
+    data.update(extra or {})
+
+    if binary:
+        return Response(
+            content=msgpack.packb(data, use_bin_type=True),
+            media_type=MSGPACK_MEDIA_TYPE,
+            headers={"Vary": "Accept"}
+        )
+    return JSONResponse(data, headers={"Vary": "Accept"})
+
 
 @router.get("")
-async def get_graph_data():
+async def get_graph_data(request: Request, format: str = GRAPH_FORMATS, fields: str | None = GRAPH_FIELDS,
+                         layout: bool = GRAPH_LAYOUT):
+    try:
+        snapshot = await get_snapshot(driver)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Как и раньше, в граф попадают только узлы, у которых есть хотя бы одна связь
+    nodes = select_nodes(snapshot, np.flatnonzero(snapshot.degree > 0))
+    relationships = snapshot.links(*snapshot.all_edges())
+    if layout:
+        nodes = await with_layout(snapshot, nodes)
+    return graph_response(request, nodes, relationships, format, fields, layout)
+
+
+@router.get("/neighborhood/{id}")
+async def get_graph_neighborhood(
+    id: str,
+    request: Request,
+    depth: int = Query(1, ge=1, le=MAX_NEIGHBORHOOD_DEPTH),
+    types: list[str] | None = Query(None, description="Relationship types to follow; all if omitted"),
+    max_nodes: int = Query(200, ge=1, le=MAX_NEIGHBORHOOD_NODES),
+    format: str = GRAPH_FORMATS,
+    fields: str | None = GRAPH_FIELDS,
+    layout: bool = GRAPH_LAYOUT
+):
+    """Окрестность узла: обход в ширину по связям в обе стороны, не больше max_nodes узлов."""
+    if types:
+        unknown = [t for t in types if t not in RELATIONSHIP_LABELS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Invalid relationship types: {', '.join(unknown)}")
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (n)-[r]->(m)
-                RETURN n, r, m
-                """
-            )
-            nodes = []
-            relationships = []
-            node_ids = set()
-
-            for record in result:
-                node_a = record["n"]
-                node_b = record["m"]
-                relationship = record["r"]
-
-                if node_a.id not in node_ids:
-                    node_ids.add(node_a.id)
-                    nodes.append({
-                        "id": node_a.id,
-                        "label": next(iter(node_a.labels), "Unknown"),
-                        "properties": dict(node_a)
-                    })
-
-                if node_b.id not in node_ids:
-                    node_ids.add(node_b.id)
-                    nodes.append({
-                        "id": node_b.id,
-                        "label": next(iter(node_b.labels), "Unknown"),
-                        "properties": dict(node_b)
-                    })
-
-                relationships.append({
-                    "type": relationship.type,
-                    "source": node_a.id,
-                    "target": node_b.id
-                })
-
-            return {
-                "nodes": nodes,
-                "links": relationships
-            }
+        snapshot = await get_snapshot(driver)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    root = snapshot.index.get(id)
+    if root is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+
+    visited = np.zeros(snapshot.node_count, dtype=bool)
+    visited[root] = True
+    included = [np.array([root])]
+    frontier = included[0]
+    edges = []
+    truncated = False
+    reached = 0
+
+    while frontier.size and reached < depth and not truncated:
+        reached += 1
+        out_edges = snapshot.out_edges(frontier, types)
+        in_edges = snapshot.in_edges(frontier, types)
+        edges += [out_edges, in_edges]
+
+        neighbors = np.unique(np.concatenate([out_edges[1], in_edges[0]]))
+        candidates = neighbors[~visited[neighbors]]
+        # Соседи одного уровня добавляются в порядке имени, чтобы обрезка была детерминированной
+        candidates = candidates[np.argsort(snapshot.rank[candidates])]
+        room = max_nodes - int(visited.sum())
+        if candidates.size > room:
+            truncated = True
+            candidates = candidates[:room]
+        visited[candidates] = True
+        included.append(candidates)
+        frontier = candidates
+
+    sources, targets, rel_types = (np.concatenate(column) for column in zip(*edges))
+    # Связи к узлам, не вошедшим в бюджет, отбрасываются; связь между двумя узлами фронта встречается дважды
+    keep = visited[sources] & visited[targets]
+    unique_edges = np.unique(np.stack([sources[keep], targets[keep], rel_types[keep]]), axis=1)
+
+    nodes = select_nodes(snapshot, np.concatenate(included))
+    relationships = snapshot.links(*unique_edges)
+    if layout:
+        nodes = await with_layout(snapshot, nodes)
+    return graph_response(request, nodes, relationships, format, fields, layout, {
+        "root": id,
+        "depth": reached,
+        "truncated": truncated
+    })
+
 
 @router.get("/{entity}")
-async def get_graph_filtered_by(entity: str):
+async def get_graph_filtered_by(entity: str, request: Request, format: str = GRAPH_FORMATS,
+                                fields: str | None = GRAPH_FIELDS, layout: bool = GRAPH_LAYOUT):
     valid_types = {"professions": "Profession", "skills": "Skill", "technologies": "Technology", "tools": "Tool",
                    "categories": "Category", "skillgroups": "SkillGroup", "technologygroups": "TechnologyGroup", "toolgroups": "ToolGroup"}
     if entity not in valid_types.keys():
         raise HTTPException(status_code=400, detail="Invalid entity")
     try:
-        with driver.session() as session:
-            result = session.run(
-                f"""
-                MATCH (n:{valid_types[entity]})
-                OPTIONAL MATCH (n)-[r]->(m)
-                RETURN n, r, m
-                """
-            )
-            nodes = []
-            relationships = []
-            node_ids = set()
-
-            for record in result:
-                node_a = record["n"]
-                node_b = record["m"]
-                relationship = record["r"]
-
-                if node_a.id not in node_ids:
-                    node_ids.add(node_a.id)
-                    nodes.append({
-                        "id": node_a.id,
-                        "label": next(iter(node_a.labels), "Unknown"),
-                        "properties": dict(node_a)
-                    })
-
-                if relationship is not None: {
-                    relationships.append({
-                        "type": relationship.type,
-                        "source": node_a.id,
-                        "target": node_b.id
-                    })
-                }
-
-            return {
-                "nodes": nodes,
-                "links": relationships
-            }
+        snapshot = await get_snapshot(driver)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    selected = np.flatnonzero(snapshot.labels == snapshot.label_code(valid_types[entity]))
+    sources, targets, rel_types = snapshot.out_edges(selected)
+
+    # Концы связей за пределами выбранной метки в полный ответ не входят; в компактном
+    # они нужны, чтобы связь можно было записать парой индексов
+    if format == "compact" or wants_msgpack(request):
+        selected = np.concatenate([selected, np.setdiff1d(targets, selected)])
+    nodes = select_nodes(snapshot, selected)
+    relationships = snapshot.links(sources, targets, rel_types)
+    if layout:
+        nodes = await with_layout(snapshot, nodes)
+    return graph_response(request, nodes, relationships, format, fields, layout)
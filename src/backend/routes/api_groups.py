@@ -1,12 +1,46 @@
 from fastapi import APIRouter, HTTPException
 from database import driver
-import os
+from images import get_image_url
+from cache import cached
+from pagination import Page, PageLimit, PageCursor
+from utils import fulltext_query
+from queries import register, read, read_one
 
 router = APIRouter(prefix="/api/groups", tags=["groups"])
 
+# Поиск по имени отдельно в каждой метке групп (по индексу name), участники - одним подзапросом.
+# У каждой метки группы только один входящий тип связи, поэтому порядок участников прежний
+GROUP_DETAIL_QUERY = register("groups.get_group_name", """
+    CALL {
+        MATCH (g:Category {name: $name}) RETURN g
+        UNION
+        MATCH (g:SkillGroup {name: $name}) RETURN g
+        UNION
+        MATCH (g:TechnologyGroup {name: $name}) RETURN g
+        UNION
+        MATCH (g:ToolGroup {name: $name}) RETURN g
+    }
+    WITH g LIMIT 1
+    RETURN g.name AS name, g.id AS id, g.description AS description,
+           COLLECT {
+               MATCH (g)<-[:BELONGS_TO|GROUPS_SKILL|GROUPS_TECH|GROUPS_TOOL]-(m:Profession|Skill|Technology|Tool)
+               RETURN DISTINCT m.name
+           } AS participants
+    """)
+
+
+GET_GROUPS_QUERY = register("groups.get_groups", """
+    MATCH (g:{label})
+    WHERE {condition}
+    RETURN g.name as name, g.description AS description, g.time AS time, g.id AS id, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
 
 @router.get("/{group_type}")
-async def get_groups(group_type: str):
+@cached
+async def get_groups(group_type: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
     valid_types = {
         "categories": "Category",
         "skillgroups": "SkillGroup", 
@@ -20,38 +54,23 @@ async def get_groups(group_type: str):
             detail=f"Invalid group type. Valid types are: {', '.join(valid_types.keys())}"
         )
 
+    page = Page(limit, cursor, ["g.name_lower", "g.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                f"""
-                MATCH (g:{valid_types[group_type]})
-                RETURN g.name as name, g.description AS description, g.time AS time, g.id AS id
-                ORDER BY toLower(g.name)
-                """,
-            )
+        records = await read(driver, GET_GROUPS_QUERY, page.params, **page.template, label=valid_types[group_type])
+
+        groups = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
 
-            groups = []
-            for record in result:
-                group_id = record["id"]
-                static_path = "static/images"
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                # Проверяем существование файла изображения
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{group_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{group_id}{ext}"
-                        break
-
-                groups.append({
-                    "name": record["name"],
-                    "description": record.get("description", ""),
-                    "time": record["time"],
-                    "image": image_url
-                })
-
-            return groups
+            groups.append({
+                "name": record["name"],
+                "description": record.get("description", ""),
+                "time": record["time"],
+                "image": image_url
+            })
+
+        return page.result(groups)
 
     except Exception as e:
         raise HTTPException(
@@ -61,22 +80,33 @@ async def get_groups(group_type: str):
 
 
 @router.get("/categories/search/by_name/{search_term}")
-async def search_categories_by_name(search_term: str):
-    return await search_group_type_by_name("Category", search_term)
+async def search_categories_by_name(search_term: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    return await search_group_type_by_name("Category", search_term, limit, cursor)
 
 @router.get("/skillgroups/search/by_name/{search_term}")
-async def search_skillgroups_by_name(search_term: str):
-    return await search_group_type_by_name("SkillGroup", search_term)
+async def search_skillgroups_by_name(search_term: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    return await search_group_type_by_name("SkillGroup", search_term, limit, cursor)
 
 @router.get("/technologygroups/search/by_name/{search_term}")
-async def search_technologygroups_by_name(search_term: str):
-    return await search_group_type_by_name("TechnologyGroup", search_term)
+async def search_technologygroups_by_name(search_term: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    return await search_group_type_by_name("TechnologyGroup", search_term, limit, cursor)
 
 @router.get("/toolgroups/search/by_name/{search_term}")
-async def search_toolgroups_by_name(search_term: str):
-    return await search_group_type_by_name("ToolGroup", search_term)
+async def search_toolgroups_by_name(search_term: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    return await search_group_type_by_name("ToolGroup", search_term, limit, cursor)
+
+
+SEARCH_GROUP_TYPE_BY_NAME_QUERY = register("groups.search_group_type_by_name", """
+    CALL db.index.fulltext.queryNodes("catalog_fulltext", $search_term) YIELD node AS g, score
+    WHERE g:{label} AND {condition} AND toLower(g.name) CONTAINS toLower($phrase)
+    RETURN g.name as name, g.description AS description, g.id AS id, score, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
 
-async def search_group_type_by_name(neo4j_label: str, search_term: str):
+async def search_group_type_by_name(neo4j_label: str, search_term: str, limit=None, cursor=None):
+    page = Page(limit, cursor, ["-score", "g.name_lower", "g.id"])
     try:
         search_term = search_term.strip()
         if not search_term:
@@ -92,38 +122,25 @@ async def search_group_type_by_name(neo4j_label: str, search_term: str):
                 detail=f"Invalid group type. Valid types are: {', '.join(valid_labels)}"
             )
 
-        with driver.session() as session:
-            result = session.run(
-                f"""
-                MATCH (g:{neo4j_label})
-                WHERE toLower(g.name) CONTAINS toLower($search_term)
-                RETURN g.name as name, g.description AS description, g.id AS id
-                ORDER BY toLower(g.name)
-                """,
-                {"search_term": search_term.strip()}
-            )
+        query = fulltext_query(search_term, "name")
+        if query is None:
+            return page.result([])
 
-            groups = []
-            for record in result:
-                group_id = record["id"]
-                static_path = "static/images"
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
+        records = await read(driver, SEARCH_GROUP_TYPE_BY_NAME_QUERY, {"search_term": query, "phrase": search_term.strip(), **page.params}, **page.template, label=neo4j_label)
 
-                # Проверяем существование файла изображения
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{group_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{group_id}{ext}"
-                        break
+        groups = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
 
-                groups.append({
-                    "name": record["name"],
-                    "description": record.get("description", ""),
-                    "image": image_url
-                })
+            groups.append({
+                "name": record["name"],
+                "description": record.get("description", ""),
+                "image": image_url,
+                "score": record["score"]
+            })
 
-            return groups
+        return page.result(groups)
 
     except HTTPException:
         raise
@@ -135,22 +152,33 @@ async def search_group_type_by_name(neo4j_label: str, search_term: str):
 
 
 @router.get("/categories/search/by_description/{search_term}")
-async def search_categories_by_description(search_term: str):
-    return await search_group_type_by_description("Category", search_term)
+async def search_categories_by_description(search_term: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    return await search_group_type_by_description("Category", search_term, limit, cursor)
 
 @router.get("/skillgroups/search/by_description/{search_term}")
-async def search_skillgroups_by_description(search_term: str):
-    return await search_group_type_by_description("SkillGroup", search_term)
+async def search_skillgroups_by_description(search_term: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    return await search_group_type_by_description("SkillGroup", search_term, limit, cursor)
 
 @router.get("/technologygroups/search/by_description/{search_term}")
-async def search_technologygroups_by_description(search_term: str):
-    return await search_group_type_by_description("TechnologyGroup", search_term)
+async def search_technologygroups_by_description(search_term: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    return await search_group_type_by_description("TechnologyGroup", search_term, limit, cursor)
 
 @router.get("/toolgroups/search/by_description/{search_term}")
-async def search_toolgroups_by_description(search_term: str):
-    return await search_group_type_by_description("ToolGroup", search_term)
+async def search_toolgroups_by_description(search_term: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    return await search_group_type_by_description("ToolGroup", search_term, limit, cursor)
+
 
-async def search_group_type_by_description(neo4j_label: str, search_term: str):
+SEARCH_GROUP_TYPE_BY_DESCRIPTION_QUERY = register("groups.search_group_type_by_description", """
+    CALL db.index.fulltext.queryNodes("catalog_fulltext", $search_term) YIELD node AS g, score
+    WHERE g:{label} AND {condition} AND toLower(coalesce(g.description, "")) CONTAINS toLower($phrase)
+    RETURN g.name as name, g.description AS description, g.id AS id, score, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
+async def search_group_type_by_description(neo4j_label: str, search_term: str, limit=None, cursor=None):
+    page = Page(limit, cursor, ["-score", "g.name_lower", "g.id"])
     try:
         search_term = search_term.strip()
         if not search_term:
@@ -166,44 +194,31 @@ async def search_group_type_by_description(neo4j_label: str, search_term: str):
                 detail=f"Invalid group type. Valid types are: {', '.join(valid_labels)}"
             )
 
-        with driver.session() as session:
-            result = session.run(
-                f"""
-                MATCH (g:{neo4j_label})
-                WHERE toLower(g.description) CONTAINS toLower($search_term)
-                RETURN g.name as name, g.description AS description, g.id AS id
-                ORDER BY toLower(g.name)
-                """,
-                {"search_term": search_term.strip()}
+        query = fulltext_query(search_term, "description")
+        if query is None:
+            return page.result([])
+
+        records = await read(driver, SEARCH_GROUP_TYPE_BY_DESCRIPTION_QUERY, {"search_term": query, "phrase": search_term.strip(), **page.params}, **page.template, label=neo4j_label)
+
+        groups = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            groups.append({
+                "name": record["name"],
+                "description": record.get("description", ""),
+                "image": image_url,
+                "score": record["score"]
+            })
+
+        if not groups:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No {neo4j_label} groups found with matching description"
             )
 
-            groups = []
-            for record in result:
-                group_id = record["id"]
-                static_path = "static/images"
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                # Проверяем существование файла изображения
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{group_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{group_id}{ext}"
-                        break
-
-                groups.append({
-                    "name": record["name"],
-                    "description": record.get("description", ""),
-                    "image": image_url
-                })
-
-            if not groups:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"No {neo4j_label} groups found with matching description"
-                )
-
-            return groups
+        return page.result(groups)
 
     except HTTPException:
         raise
@@ -223,54 +238,24 @@ async def get_group_name(name: str):
                 detail="Group name cannot be empty"
             )
 
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (g)
-                WHERE (g:Category OR g:SkillGroup OR g:TechnologyGroup OR g:ToolGroup)
-                AND g.name = $name
-                OPTIONAL MATCH (g)<-[:BELONGS_TO]-(p:Profession)
-                OPTIONAL MATCH (g)<-[:GROUPS_SKILL]-(s:Skill)
-                OPTIONAL MATCH (g)<-[:GROUPS_TECH]-(t:Technology)
-                OPTIONAL MATCH (g)<-[:GROUPS_TOOL]-(tool:Tool)
-                WITH g, collect(DISTINCT p.name) AS professions, 
-                    collect(DISTINCT s.name) AS skills, 
-                    collect(DISTINCT t.name) AS technologies, 
-                    collect(DISTINCT tool.name) AS tools
-                RETURN g.name AS name, g.id AS id, g.description AS description, 
-                    professions + skills + technologies + tools AS participants
-                LIMIT 1 
-                """,
-                {"name": name}
+        record = await read_one(driver, GROUP_DETAIL_QUERY, {"name": name})
+        if not record:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Group '{name}' not found"
             )
-            
-            record = result.single()
-            if not record:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Group '{name}' not found"
-                )
-            
-            group_id = record["id"]
-            
-            # Определяем расширение изображения
-            static_path = "static/images"
-            extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-            image_url = "http://localhost:8000/static/images/in_progress.jpg"
-            
-            for ext in extensions:
-                file_path = os.path.join(static_path, f"{group_id}{ext}")
-                if os.path.exists(file_path):
-                    image_url = f"http://localhost:8000/static/images/{group_id}{ext}"
-                    break
-                    
-            return {
-                "name": record["name"],
-                "description": record["description"],
-                "participants": record["participants"],
-                "image": image_url
-            }
-            
+        
+        image_url = get_image_url(record["id"])
+                
+        return {
+            "name": record["name"],
+            "description": record["description"],
+            "participants": record["participants"],
+            "image": image_url
+        }
+        
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
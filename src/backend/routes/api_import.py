@@ -1,128 +1,126 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from database import driver, check_database_empty
-from utils import check_node_exists, delete_nodes, create_node, create_relationship, get_utc3_time
-import json
+from utils import delete_nodes
+from loader import bulk_load
+from images import IMAGE_DIR, register_image
+from catalog import bump_catalog_version
+import ijson
+from collections import deque
 import zipfile
-import io
 import os
 import shutil
-import tempfile
 
 router = APIRouter(prefix="/api", tags=["import"])
 
+IMPORT_IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.webp'}
+
+
+def has_nodes_array(json_file):
+    # Файл разбирается целиком (потоково, без загрузки в память): битый JSON должен
+    # обнаружиться до удаления каталога, а не посреди загрузки. Поиск события и
+    # дочитывание остатка идут без цикла на Python, поэтому проход дешевле загрузки
+    events = ijson.parse(json_file)
+    found = ("nodes", "start_array", None) in events
+    deque(events, maxlen=0)
+    return found
+
+
+def check_data_json(zip_ref, json_member):
+    with zip_ref.open(json_member) as f:
+        return has_nodes_array(f)
+
+
+class ImageSaver:
+    """Копирует изображения узлов каждой записанной пачки: поиск по словарю членов архива."""
+
+    def __init__(self, zip_ref, image_members):
+        self.zip_ref = zip_ref
+        self.image_members = image_members
+        self.saved = 0
+
+    def __call__(self, rows):
+        for _, properties in rows:
+            node_id = properties.get("id")
+            info = self.image_members.get(str(node_id)) if node_id else None
+            if info is None:
+                continue
+            ext = os.path.splitext(info.filename)[1].lower()
+            filename = f"{node_id}{ext}"
+            with self.zip_ref.open(info) as src, open(os.path.join(IMAGE_DIR, filename), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            register_image(node_id, filename)
+            self.saved += 1
+
+
 @router.post("/import")
 async def import_data(
     archive: UploadFile = File(..., description="ZIP file containing data.json and images")
 ):
+    catalog_changed = False
     try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-        
-            archive_data = await archive.read()
-            with zipfile.ZipFile(io.BytesIO(archive_data)) as zip_ref:
-                zip_ref.extractall(temp_dir)
-
-            json_candidates = []
-            
-            for root, _, files in os.walk(temp_dir):
-                if "data.json" in files:
-                    json_candidates.append(os.path.join(root, "data.json"))
-            
+        # Starlette уже сбросил загрузку на диск по частям (SpooledTemporaryFile),
+        # поэтому архив читается напрямую, без копии в памяти и без распаковки во временную папку
+        with zipfile.ZipFile(archive.file) as zip_ref:
+            members = [info for info in zip_ref.infolist() if not info.is_dir()]
+
+            json_candidates = [
+                info for info in members
+                if os.path.basename(info.filename) == "data.json"
+            ]
+
             if not json_candidates:
                 raise HTTPException(status_code=400, detail="ZIP archive must contain a data.json file")
             if len(json_candidates) > 1:
                 raise HTTPException(status_code=400, detail="Multiple data.json files found in ZIP archive")
-            
-            json_file_path = json_candidates[0]
-            
-
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
 
+            json_member = json_candidates[0]
 
-            if "nodes" not in data:
+            if not await run_in_threadpool(check_data_json, zip_ref, json_member):
                 raise HTTPException(status_code=400, detail="JSON must contain 'nodes' array")
 
 
-            image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.webp'}
-            image_files = {}
-            
-            for root, _, files in os.walk(temp_dir):
-                for filename in files:
-                    if filename == "data.json":
-                        continue
-                    ext = os.path.splitext(filename)[1].lower()
-                    if ext in image_extensions:
-                    
-                        file_key = os.path.splitext(filename)[0]
-                        image_files[file_key] = os.path.join(root, filename)
-
-
-            if not check_database_empty(driver):
-                delete_nodes(driver)
-            
-            node_ids = []
-            relationship_count = 0
-            with driver.session() as session:
-
-                for node in data.get("nodes", []):
-                    label = node.get("label")
-                    properties = node.get("properties", {})
-                    name = properties.get("name")
-                    node_id = properties.get("id")
-                    
-                    if node_id:
-                        node_ids.append(node_id)
-                    
-                    if not name:
-                        continue
-    
-                    exists = session.execute_read(
-                        check_node_exists, 
-                        label,
-                        name
-                    )
-                    if not exists:
-                        properties["time"] = get_utc3_time()
-                        session.execute_write(
-                            create_node,
-                            label,
-                            properties
-                        )
-
-
-                for rel in data.get("relationships", []):
-                    session.execute_write(
-                        create_relationship,
-                        rel["startNode"],
-                        rel["endNode"],
-                        rel["type"]
-                    )
-                    relationship_count += 1
-
-
-            os.makedirs("static/images", exist_ok=True)
-            saved_images_count = 0
-            
-            for node_id in node_ids:
-
-                if str(node_id) in image_files:
-                    src_path = image_files[str(node_id)]
-                    ext = os.path.splitext(src_path)[1].lower()
-                    dest_path = f"static/images/{node_id}{ext}"
-                    
-                    if os.path.exists(src_path):
-                        shutil.copy(src_path, dest_path)
-                        saved_images_count += 1
-            
+            image_members = {}
+
+            for info in members:
+                filename = os.path.basename(info.filename)
+                if filename == "data.json":
+                    continue
+                file_key, ext = os.path.splitext(filename)
+                if ext.lower() in IMPORT_IMAGE_EXTENSIONS:
+                    image_members[file_key] = info
+
+
+            catalog_changed = True
+            if not await check_database_empty(driver):
+                await delete_nodes(driver)
+
+            save_images = ImageSaver(zip_ref, image_members)
+
+            # data.json читается из архива потоково: узлы и затем связи, каждый массив
+            # отдельным проходом парсера на C (общий поток событий ijson через Python медленнее),
+            # так что в памяти одновременно находится не больше одной пачки загрузчика.
+            # Распаковка, разбор и копирование изображений пачки идут в пуле потоков (bulk_load)
+            def stream_items(prefix):
+                with zip_ref.open(json_member) as f:
+                    yield from ijson.items(f, prefix, use_float=True)
+
+            stats = await bulk_load(driver, stream_items("nodes.item"), stream_items("relationships.item"),
+                                    on_nodes=save_images)
+
             return {
                 "success": True,
                 "message": f"Import completed successfully",
-                "count": len(node_ids),
-                "relationships": relationship_count,
-                "images": saved_images_count
+                "count": stats["nodes"],
+                "relationships": stats["relationships"],
+                "images": save_images.saved,
+                "nodes_per_sec": stats["nodes_per_sec"],
+                "relationships_per_sec": stats["relationships_per_sec"]
             }
 
-    except json.JSONDecodeError:
+    except HTTPException:
+        raise
+    except ijson.JSONError:
         raise HTTPException(status_code=400, detail="Invalid JSON format")
     except zipfile.BadZipFile:
         raise HTTPException(status_code=400, detail="Invalid ZIP archive")
@@ -130,3 +128,5 @@ async def import_data(
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         await archive.close()
+        if catalog_changed:
+            await bump_catalog_version(driver)
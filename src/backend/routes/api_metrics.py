@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+from metrics import metrics_response
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return metrics_response()
@@ -1,43 +1,68 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from database import driver
-import os
+from graph_snapshot import get_snapshot
+from similarity import get_similarity, SIMILAR_MAX_K
+from matching import get_matcher
+from pydantic import BaseModel
+from images import get_image_url
+from cache import cached
+from pagination import Page, PageLimit, PageCursor
+from utils import fulltext_query
+from batch import BatchRequest, run_batch
+from queries import register, read, read_one
 
 router = APIRouter(prefix="/api/professions", tags=["professions"])
 
 
+# Каждый список собирается своим подзапросом, поэтому строки навыков, технологий
+# и инструментов не перемножаются между собой
+PROFESSION_DETAIL_QUERY = register("professions.get_profession", """
+    MATCH (p:Profession {name: $profession_name})
+    RETURN p.name AS profession_name,
+           p.id AS id,
+           p.time AS time,
+           [(p)-[:BELONGS_TO]->(c:Category) | c.name][0] AS category_name,
+           COLLECT { MATCH (p)-[:REQUIRES]->(s:Skill) RETURN DISTINCT s.name } AS skills,
+           COLLECT { MATCH (p)-[:USES_TECH]->(t:Technology) RETURN DISTINCT t.name } AS technologies,
+           COLLECT { MATCH (p)-[:USES_TOOL]->(tool:Tool) RETURN DISTINCT tool.name } AS tools
+    LIMIT 1
+    """)
+
+
+class MatchRequest(BaseModel):
+    skills: list[str] = []
+    technologies: list[str] = []
+    tools: list[str] = []
+
+
+GET_PROFESSIONS_QUERY = register("professions.get_professions", """
+    MATCH (p:Profession)-[:BELONGS_TO]->(c:Category)
+    WHERE {condition}
+    RETURN p.name AS profession_name, c.name AS category_name, p.id AS id, p.time AS time, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("")
-async def get_professions():
+@cached
+async def get_professions(limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["p.name_lower", "p.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (p:Profession)-[:BELONGS_TO]->(c:Category)
-                RETURN p.name AS profession_name, c.name AS category_name, p.id AS id, p.time AS time
-                ORDER BY toLower(p.name)
-                """
-            )
-            professions = []
-            for record in result:
-                image_id = record["id"]
-                static_path = "static/images"  # Путь к папке с изображениями
-                
-                # Проверяем существование файла с разными расширениями
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-                
-                for ext in extensions:
-                    if os.path.exists(f"{static_path}/{image_id}{ext}"):
-                        image_url = f"http://localhost:8000/static/images/{image_id}{ext}"
-                        break
-                
-                professions.append({
-                    "profession": record["profession_name"],
-                    "category": record["category_name"],
-                    "image": image_url,
-                    "time": record["time"]
-                })
+        records = await read(driver, GET_PROFESSIONS_QUERY, page.params, **page.template)
+        professions = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
             
-            return professions
+            professions.append({
+                "profession": record["profession_name"],
+                "category": record["category_name"],
+                "image": image_url,
+                "time": record["time"]
+            })
+        
+        return page.result(professions)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -45,134 +70,184 @@ async def get_professions():
 @router.get("/{name}")
 async def get_profession(name: str):
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (p:Profession)
-                WHERE p.name = $profession_name
-                OPTIONAL MATCH (p)-[:REQUIRES]->(s:Skill)
-                OPTIONAL MATCH (p)-[:USES_TECH]->(t:Technology)
-                OPTIONAL MATCH (p)-[:USES_TOOL]->(tool:Tool)
-                OPTIONAL MATCH (p)-[:BELONGS_TO]->(c:Category)
-                RETURN p.name AS profession_name, 
-                       p.id AS id,
-                       p.time AS time,
-                       c.name AS category_name,
-                       collect(DISTINCT s.name) AS skills,
-                       collect(DISTINCT t.name) AS technologies,
-                       collect(DISTINCT tool.name) AS tools
-                """,
-                {"profession_name": name}
-            )
-            
-            record = result.single()
-            if not record:
-                raise HTTPException(status_code=404, detail="Profession not found")
-            
-            # Определяем расширение изображения
-            image_id = record["id"]
-            static_path = "static/images"  # Путь относительно корня проекта
-            extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-            image_url = "http://localhost:8000/static/images/in_progress.jpg"
-            
-            for ext in extensions:
-                if os.path.exists(f"{static_path}/{image_id}{ext}"):
-                    image_url = f"http://localhost:8000/static/images/{image_id}{ext}"
-                    break
-            
-            return {
+        record = await read_one(driver, PROFESSION_DETAIL_QUERY, {"profession_name": name})
+        if not record:
+            raise HTTPException(status_code=404, detail="Profession not found")
+        
+        image_url = get_image_url(record["id"])
+        
+        return {
+            "profession": record["profession_name"],
+            "time": record["time"],
+            "category": record["category_name"],
+            "skills": record["skills"],
+            "technologies": record["technologies"],
+            "tools": record["tools"],
+            "image": image_url 
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+PROFESSION_BATCH_BODY = """
+    RETURN key, n IS NOT NULL AS found, n.name AS profession_name, n.id AS id, n.time AS time,
+           [(n)-[:BELONGS_TO]->(c:Category) | c.name][0] AS category_name,
+           COLLECT { MATCH (n)-[:REQUIRES]->(s:Skill) RETURN DISTINCT s.name } AS skills,
+           COLLECT { MATCH (n)-[:USES_TECH]->(t:Technology) RETURN DISTINCT t.name } AS technologies,
+           COLLECT { MATCH (n)-[:USES_TOOL]->(tool:Tool) RETURN DISTINCT tool.name } AS tools
+    """
+
+
+@router.post("/batch")
+async def get_professions_batch(request: BatchRequest):
+    """Карточки нескольких профессий одним запросом, по именам и/или id."""
+    try:
+        return await run_batch(driver, "Profession", PROFESSION_BATCH_BODY, request, lambda record: {
                 "profession": record["profession_name"],
                 "time": record["time"],
                 "category": record["category_name"],
                 "skills": record["skills"],
                 "technologies": record["technologies"],
                 "tools": record["tools"],
-                "image": image_url 
+                "image": get_image_url(record["id"])
+            })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{name}/similar")
+async def get_similar_professions(
+    name: str,
+    k: int = Query(10, ge=1, le=SIMILAR_MAX_K),
+    metric: str = Query("jaccard", pattern="^(jaccard|cosine)$")
+):
+    """Ближайшие профессии по общим навыкам, технологиям и инструментам."""
+    try:
+        similarity = await get_similarity(await get_snapshot(driver))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    similar = similarity.similar(name, metric, k)
+    if similar is None:
+        raise HTTPException(status_code=404, detail="Profession not found")
+
+    properties = similarity.snapshot.properties
+    return {
+        "profession": name,
+        "metric": metric,
+        "similar": [
+            {
+                "profession": properties[node].get("name"),
+                "category": similarity.categories.get(node),
+                "image": get_image_url(properties[node].get("id")),
+                "score": score,
+                "shared": shared
             }
-            
-    except HTTPException:
-        raise
+            for node, score, shared in similar
+        ]
+    }
+
+
+@router.post("/match")
+async def match_professions(request: MatchRequest, limit: int = Query(20, ge=1, le=500)):
+    """Профессии, отсортированные по доле покрытых навыков, технологий и инструментов из запроса."""
+    try:
+        matcher = await get_matcher(await get_snapshot(driver))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    columns, unknown = matcher.resolve(request.model_dump())
+    if not columns:
+        return {"requested": 0, "unknown": unknown, "professions": []}
+
+    properties = matcher.snapshot.properties
+    return {
+        "requested": len(columns),
+        "unknown": unknown,
+        "professions": [
+            {
+                "profession": properties[node].get("name"),
+                "category": matcher.categories.get(node),
+                "image": get_image_url(properties[node].get("id")),
+                "coverage": coverage,
+                "covered": covered,
+                "missing": missing
+            }
+            for node, covered, coverage, missing in matcher.match(columns, limit)
+        ]
+    }
+
+
+GET_PROFESSIONS_SORTED_BY_CATEGORIES_QUERY = register("professions.get_professions_sorted_by_categories", """
+    MATCH (p:Profession)-[:BELONGS_TO]->(c:Category)
+    WHERE {condition}
+    RETURN p.name AS profession_name, c.name AS category_name, p.id AS id, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/filter/categories")
-async def get_professions_sorted_by_categories():
+@cached
+async def get_professions_sorted_by_categories(limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["c.name_lower", "p.name_lower", "p.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (p:Profession)-[:BELONGS_TO]->(c:Category)
-                RETURN p.name AS profession_name, c.name AS category_name, p.id AS id
-                ORDER BY toLower(category_name), toLower(p.name)
-                """
-            )
+        records = await read(driver, GET_PROFESSIONS_SORTED_BY_CATEGORIES_QUERY, page.params, **page.template)
 
-            professions = []
-            for record in result:
-                image_id = record["id"]
-                static_path = "static/images"  # Путь относительно корня проекта
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-                
-                # Проверяем существование файла с разными расширениями
-                for ext in extensions:
-                    if os.path.exists(f"{static_path}/{image_id}{ext}"):
-                        image_url = f"http://localhost:8000/static/images/{image_id}{ext}"
-                        break
-
-                professions.append({
-                    "profession": record["profession_name"],
-                    "category": record["category_name"],
-                    "image": image_url
-                })
-
-            return professions
+        professions = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            professions.append({
+                "profession": record["profession_name"],
+                "category": record["category_name"],
+                "image": image_url
+            })
+
+        return page.result(professions)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+GET_PROFESSIONS_FILTERED_BY_CATEGORY_QUERY = register("professions.get_professions_filtered_by_category", """
+    MATCH (c:Category)<-[:BELONGS_TO]-(p:Profession)
+    WHERE c.name = $name AND {condition}
+    RETURN p.name AS profession_name, c.name AS category_name, p.id AS id, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/filter/categories/{name}")
-async def get_professions_filtered_by_category(name: str):
+@cached
+async def get_professions_filtered_by_category(name: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["p.name_lower", "p.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (c:Category)<-[:BELONGS_TO]-(p:Profession)
-                WHERE c.name = $name
-                RETURN p.name AS profession_name, c.name AS category_name, p.id AS id
-                ORDER BY toLower(p.name)
-                """,
-                {"name": name}
+        records = await read(driver, GET_PROFESSIONS_FILTERED_BY_CATEGORY_QUERY, {"name": name, **page.params}, **page.template)
+
+        professions = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            professions.append({
+                "profession": record["profession_name"],
+                "category": record["category_name"],
+                "image": image_url
+            })
+
+        if not professions:  # Если категория не содержит профессий
+            raise HTTPException(
+                status_code=404,
+                detail=f"No professions found for category '{name}'"
             )
 
-            professions = []
-            for record in result:
-                image_id = record["id"]
-                static_path = "static/images"  # Путь к папке с изображениями
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                # Проверяем существование файла с разными расширениями
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{image_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{image_id}{ext}"
-                        break
-
-                professions.append({
-                    "profession": record["profession_name"],
-                    "category": record["category_name"],
-                    "image": image_url
-                })
-
-            if not professions:  # Если категория не содержит профессий
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"No professions found for category '{name}'"
-                )
-
-            return professions
+        return page.result(professions)
 
     except HTTPException:
         raise
@@ -180,47 +255,40 @@ async def get_professions_filtered_by_category(name: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+GET_PROFESSIONS_FILTERED_BY_SKILL_QUERY = register("professions.get_professions_filtered_by_skill", """
+    MATCH (s:Skill)<-[:REQUIRES]-(p:Profession)-[:BELONGS_TO]->(c:Category)
+    WHERE s.name = $name AND {condition}
+    RETURN DISTINCT p.name AS profession_name, c.name AS category_name, p.id AS id, {sort_key} AS sort_key
+    ORDER BY sort_key
+    {limit_clause}
+    """)
+
+
 @router.get("/filter/skills/{name}")
-async def get_professions_filtered_by_skill(name: str):
+@cached
+async def get_professions_filtered_by_skill(name: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["p.name_lower", "p.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (s:Skill)<-[:REQUIRES]-(p:Profession)-[:BELONGS_TO]->(c:Category)
-                WHERE s.name = $name
-                RETURN DISTINCT p.name AS profession_name, c.name AS category_name, p.id AS id
-                ORDER BY toLower(p.name)
-                """,
-                {"name": name}
+        records = await read(driver, GET_PROFESSIONS_FILTERED_BY_SKILL_QUERY, {"name": name, **page.params}, **page.template)
+
+        professions = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            professions.append({
+                "profession": record["profession_name"],
+                "category": record["category_name"],
+                "image": image_url 
+            })
+
+        if not professions:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No professions found requiring skill '{name}'"
             )
 
-            professions = []
-            for record in result:
-                image_id = record["id"]
-                static_path = "static/images"  # Путь к папке с изображениями
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                # Проверяем существование файла с разными расширениями
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{image_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{image_id}{ext}"
-                        break
-
-                professions.append({
-                    "profession": record["profession_name"],
-                    "category": record["category_name"],
-                    "image": image_url 
-                })
-
-            if not professions:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"No professions found requiring skill '{name}'"
-                )
-
-            return professions
+        return page.result(professions)
 
     except HTTPException:
         raise
@@ -228,47 +296,40 @@ async def get_professions_filtered_by_skill(name: str):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+GET_PROFESSIONS_FILTERED_BY_TECHNOLOGY_QUERY = register("professions.get_professions_filtered_by_technology", """
+    MATCH (t:Technology)<-[:USES_TECH]-(p:Profession)-[:BELONGS_TO]->(c:Category)
+    WHERE t.name = $name AND {condition}
+    RETURN DISTINCT p.name AS profession_name, c.name AS category_name, p.id AS id, {sort_key} AS sort_key
+    ORDER BY sort_key
+    {limit_clause}
+    """)
+
+
 @router.get("/filter/technologies/{name}")
-async def get_professions_filtered_by_technology(name: str):
+@cached
+async def get_professions_filtered_by_technology(name: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["p.name_lower", "p.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Technology)<-[:USES_TECH]-(p:Profession)-[:BELONGS_TO]->(c:Category)
-                WHERE t.name = $name
-                RETURN DISTINCT p.name AS profession_name, c.name AS category_name, p.id AS id
-                ORDER BY toLower(p.name)
-                """,
-                {"name": name}
+        records = await read(driver, GET_PROFESSIONS_FILTERED_BY_TECHNOLOGY_QUERY, {"name": name, **page.params}, **page.template)
+
+        professions = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            professions.append({
+                "profession": record["profession_name"],
+                "category": record["category_name"],
+                "image": image_url
+            })
+
+        if not professions:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No professions found using technology '{name}'"
             )
 
-            professions = []
-            for record in result:
-                image_id = record["id"]
-                static_path = "static/images"
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                # Проверка существования файла изображения
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{image_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{image_id}{ext}"
-                        break
-
-                professions.append({
-                    "profession": record["profession_name"],
-                    "category": record["category_name"],
-                    "image": image_url
-                })
-
-            if not professions:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"No professions found using technology '{name}'"
-                )
-
-            return professions
+        return page.result(professions)
 
     except HTTPException:
         raise
@@ -279,49 +340,42 @@ async def get_professions_filtered_by_technology(name: str):
         )
 
 
+GET_PROFESSIONS_FILTERED_BY_TOOL_QUERY = register("professions.get_professions_filtered_by_tool", """
+    MATCH (tool:Tool)<-[:USES_TOOL]-(p:Profession)-[:BELONGS_TO]->(c:Category)
+    WHERE tool.name = $name AND {condition}
+    RETURN DISTINCT p.name AS profession_name, 
+           c.name AS category_name, 
+           p.id AS id, {sort_key} AS sort_key
+    ORDER BY sort_key
+    {limit_clause}
+    """)
+
+
 @router.get("/filter/tools/{name}")
-async def get_professions_filtered_by_tool(name: str):
+@cached
+async def get_professions_filtered_by_tool(name: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["p.name_lower", "p.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (tool:Tool)<-[:USES_TOOL]-(p:Profession)-[:BELONGS_TO]->(c:Category)
-                WHERE tool.name = $name
-                RETURN DISTINCT p.name AS profession_name, 
-                       c.name AS category_name, 
-                       p.id AS id
-                ORDER BY toLower(p.name)
-                """,
-                {"name": name}
+        records = await read(driver, GET_PROFESSIONS_FILTERED_BY_TOOL_QUERY, {"name": name, **page.params}, **page.template)
+
+        professions = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            professions.append({
+                "profession": record["profession_name"],
+                "category": record["category_name"],
+                "image": image_url
+            })
+
+        if not professions:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No professions found using tool '{name}'"
             )
 
-            professions = []
-            for record in result:
-                image_id = record["id"]
-                static_dir = "static/images"
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                # Проверяем существование файла изображения
-                for ext in extensions:
-                    img_path = os.path.join(os.getcwd(), static_dir, f"{image_id}{ext}")
-                    if os.path.isfile(img_path):
-                        image_url = f"http://localhost:8000/static/images/{image_id}{ext}"
-                        break
-
-                professions.append({
-                    "profession": record["profession_name"],
-                    "category": record["category_name"],
-                    "image": image_url
-                })
-
-            if not professions:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"No professions found using tool '{name}'"
-                )
-
-            return professions
+        return page.result(professions)
 
     except HTTPException:
         raise
@@ -333,8 +387,19 @@ async def get_professions_filtered_by_tool(name: str):
 
 
 
+SEARCH_PROFESSIONS_BY_NAME_QUERY = register("professions.search_professions_by_name", """
+    CALL db.index.fulltext.queryNodes("catalog_fulltext", $search_term) YIELD node AS p, score
+    WHERE p:Profession AND {condition} AND toLower(p.name) CONTAINS toLower($phrase)
+    MATCH (p)-[:BELONGS_TO]->(c:Category)
+    RETURN p.name AS profession_name, c.name AS category_name, p.id AS id, score, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/search/by_name/{search_term}")
-async def search_professions_by_name(search_term: str = ""):
+async def search_professions_by_name(search_term: str = "", limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["-score", "p.name_lower", "p.id"])
     try:
         search_term = search_term.strip()
         if not search_term:
@@ -343,38 +408,25 @@ async def search_professions_by_name(search_term: str = ""):
                 detail="Search term cannot be empty"
             )
 
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (p:Profession)-[:BELONGS_TO]->(c:Category)
-                WHERE toLower(p.name) CONTAINS toLower($search_term)
-                RETURN p.name AS profession_name, c.name AS category_name, p.id AS id
-                ORDER BY toLower(p.name)
-                """,
-                {"search_term": search_term}
-            )
+        query = fulltext_query(search_term, "name")
+        if query is None:
+            return page.result([])
+
+        records = await read(driver, SEARCH_PROFESSIONS_BY_NAME_QUERY, {"search_term": query, "phrase": search_term.strip(), **page.params}, **page.template)
+
+        professions = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            professions.append({
+                "profession": record["profession_name"],
+                "category": record["category_name"],
+                "image": image_url,
+                "score": record["score"]
+            })
 
-            professions = []
-            for record in result:
-                image_id = record["id"]
-                static_path = os.path.join("static", "images")
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                # Проверка существования файла изображения
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{image_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"/static/images/{image_id}{ext}"
-                        break
-
-                professions.append({
-                    "profession": record["profession_name"],
-                    "category": record["category_name"],
-                    "image": image_url
-                })
-
-            return professions
+        return page.result(professions)
 
     except HTTPException:
         raise
@@ -1,43 +1,53 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
 from database import driver
-from utils import check_node_exists, create_node, create_relationship,update_node, delete_relationship, get_utc3_time
+from utils import CATALOG_LABELS, RELATIONSHIP_LABELS, check_node_exists, create_node, create_relationship, apply_edit, get_utc3_time
+from images import IMAGE_DIR, register_image, forget_image
+from catalog import bump_catalog_version
 from urllib.parse import unquote
 import json
 import os
+from queries import write_session
+from names import NamesRequest, resolve_names
 
 router = APIRouter(prefix="/api", tags=["redact"])
-IMAGE_DIR = "/app/static/images"
-os.makedirs(IMAGE_DIR, exist_ok=True)
 
 @router.get("/get_id")
-async def get_id(name: str):  
+async def get_id(name: str, label: str | None = Query(None, description="Node label; limits the lookup to one label")):
     try:
         decoded_name = unquote(name)
-        
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (n {name: $name})
-                RETURN n.id AS id
-                LIMIT 1
-                """,
-                {"name": decoded_name}
-            )
-            record = result.single()
-            if not record:
-                raise HTTPException(status_code=404, detail="Node not found")
-            return {"id": record["id"]}
+        if label is not None and label not in CATALOG_LABELS:
+            raise HTTPException(status_code=422, detail=f"Unknown label: {label}")
+
+        resolved = await resolve_names(driver, [decoded_name], label)
+        if resolved[decoded_name] is None:
+            raise HTTPException(status_code=404, detail="Node not found")
+        return resolved[decoded_name]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/get_ids")
+async def get_ids(request: NamesRequest):
+    """id и метки многих узлов по именам одним запросом (без учета регистра)."""
+    if request.label is not None and request.label not in CATALOG_LABELS:
+        raise HTTPException(status_code=422, detail=f"Unknown label: {request.label}")
+    try:
+        items = await resolve_names(driver, list(dict.fromkeys(request.names)), request.label)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return {"items": items, "not_found": [name for name, item in items.items() if item is None]}
 
 @router.post("/add")
 async def add_node(file: UploadFile = File(...),
                    image: UploadFile = File(None, description="Optional image file")):
+    catalog_changed = False
     try:
         contents = await file.read()
         data = json.loads(contents)
 
-        with driver.session() as session:
+        catalog_changed = True
+        async with write_session(driver) as session:
             for node in data.get("nodes", []):
                 label = node.get("label")
                 properties = node.get("properties", {})
@@ -46,21 +56,21 @@ async def add_node(file: UploadFile = File(...),
                 if not name:
                     continue
 
-                exists = session.execute_read(
+                exists = await session.execute_read(
                     check_node_exists, 
                     label,
                     name
                 )
                 if not exists:
                     properties["time"] = get_utc3_time()
-                    session.execute_write(
+                    await session.execute_write(
                         create_node,
                         label,
                         properties
                     )
 
             for rel in data.get("relationships", []):
-                session.execute_write(
+                await session.execute_write(
                     create_relationship,
                     rel["startNode"],
                     rel["endNode"],
@@ -82,58 +92,62 @@ async def add_node(file: UploadFile = File(...),
         contents = await image.read()
         with open(file_path, "wb") as f:
             f.write(contents)
+        register_image(target_id, filename)
         return { "status": "node added" }
 
     except json.JSONDecodeError:
         raise HTTPException(status_code=422, detail="Invalid JSON file")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Версия поднимается и при частичной записи, чтобы кеши не отдавали старые данные
+        if catalog_changed:
+            await bump_catalog_version(driver)
         
         
 @router.put("/edit")
 async def edit_node(file: UploadFile = File(...),
                     image: UploadFile = File(None, description="Optional image file")):
+    catalog_changed = False
     try:
         contents = await file.read()
         data = json.loads(contents)
 
-        with driver.session() as session:
-            for node in data.get("nodes", []):
-                name=node.get("old_name")
-                new_label = node.get("label")
-                new_properties = node.get("properties", {})
-                new_name = new_properties.get("name")
-
-                if not name:
-                    continue
-                new_properties["time"] = get_utc3_time()
-                session.execute_write(
-                        update_node,
-                        name,
-                        new_name,
-                        new_label,
-                        new_properties
-                    )
+        nodes = []
+        for node in data.get("nodes", []):
+            properties = node.get("properties", {})
+            label = node.get("label")
+            # old_label нужен только при смене метки; по умолчанию метка не меняется
+            old_label = node.get("old_label") or label
+            if not properties.get("id"):
+                raise HTTPException(status_code=422, detail=f"Node '{node.get('old_name')}' has no id")
+            if label not in CATALOG_LABELS or old_label not in CATALOG_LABELS:
+                raise HTTPException(status_code=422, detail=f"Unknown label: {old_label if label in CATALOG_LABELS else label}")
+            properties["time"] = get_utc3_time()
+            nodes.append({
+                "id": properties["id"],
+                "old_name": node.get("old_name"),
+                "old_label": old_label,
+                "label": label,
+                "properties": properties
+            })
+
+        added = [rel for group in data.get("relationships", []) for rel in group.get("add_rel", [])]
+        removed = [rel for group in data.get("relationships", []) for rel in group.get("del_rel", [])]
+        unknown_types = {rel.get("type") for rel in added + removed} - RELATIONSHIP_LABELS.keys()
+        if unknown_types:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown relationship types: {', '.join(sorted(map(str, unknown_types)))}"
+            )
 
-            for rel_group in data.get("relationships", []):
-                for rel in rel_group.get("add_rel", []):
-                    session.execute_write(
-                        create_relationship, 
-                        rel["startNode"],
-                        rel["endNode"],
-                        rel["type"]
-                    )
+        # Вся правка - одна транзакция: при ошибке не остается наполовину измененного узла
+        async with write_session(driver) as session:
+            applied = await session.execute_write(apply_edit, nodes, added, removed)
+        catalog_changed = True
 
-                for rel in rel_group.get("del_rel", []):
-                    session.execute_write(
-                        delete_relationship,  
-                        rel["startNode"],
-                        rel["endNode"],
-                        rel["type"]
-                    )
-                    
         if image:
-            target_id = new_properties.get("id")
+            target_id = nodes[-1]["properties"].get("id") if nodes else None
             
             if not target_id:
                 raise HTTPException(
@@ -145,6 +159,7 @@ async def edit_node(file: UploadFile = File(...),
             for filename in os.listdir(IMAGE_DIR):
                 if filename.startswith(str(target_id)):
                     os.remove(os.path.join(IMAGE_DIR, filename))
+            forget_image(target_id)
 
             # Сохраняем новое изображение
             file_ext = image.filename.split(".")[-1] if "." in image.filename else ""
@@ -154,9 +169,15 @@ async def edit_node(file: UploadFile = File(...),
             contents = await image.read()
             with open(file_path, "wb") as f:
                 f.write(contents)
-        return { "status": "node edited" }
+            register_image(target_id, filename)
+        return { "status": "node edited", "applied": applied }
 
+    except HTTPException:
+        raise
     except json.JSONDecodeError:
         raise HTTPException(status_code=422, detail="Invalid JSON file")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if catalog_changed:
+            await bump_catalog_version(driver)
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, HTTPException, Query
+from database import driver
+from images import get_image_url
+from utils import fulltext_query
+from queries import register, read
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+LABEL_TYPES = {
+    "Profession": "professions",
+    "Skill": "skills",
+    "Technology": "technologies",
+    "Tool": "tools",
+    "Category": "categories",
+    "SkillGroup": "skillgroups",
+    "TechnologyGroup": "technologygroups",
+    "ToolGroup": "toolgroups",
+}
+
+
+SEARCH_CATALOG_QUERY = register("search.search_catalog", """
+    CALL db.index.fulltext.queryNodes("catalog_fulltext", $search_query) YIELD node, score
+    WHERE toLower(node.name) CONTAINS toLower($phrase)
+       OR toLower(coalesce(node.description, "")) CONTAINS toLower($phrase)
+    RETURN labels(node)[0] AS label, node.name AS name, node.description AS description,
+           node.id AS id, score
+    ORDER BY score DESC, toLower(node.name)
+    LIMIT $limit
+    """)
+
+
+@router.get("")
+async def search_catalog(q: str, limit: int = Query(20, ge=1, le=100)):
+    try:
+        name_query = fulltext_query(q, "name")
+        if name_query is None:
+            return []
+
+        # Совпадения в названии весят вдвое больше совпадений в описании
+        search_query = f"({name_query})^2 OR ({fulltext_query(q, 'description')})"
+
+        records = await read(driver, SEARCH_CATALOG_QUERY, {"search_query": search_query, "phrase": q.strip(), "limit": limit})
+
+        hits = []
+        for record in records:
+            hits.append({
+                "type": LABEL_TYPES.get(record["label"], record["label"]),
+                "name": record["name"],
+                "description": record["description"],
+                "image": get_image_url(record["id"]),
+                "score": record["score"]
+            })
+
+        return hits
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
@@ -1,50 +1,58 @@
 from fastapi import APIRouter, HTTPException
 from database import driver
-import os
+from images import get_image_url
+from cache import cached
+from pagination import Page, PageLimit, PageCursor
+from utils import fulltext_query
+from batch import BatchRequest, run_batch
+from queries import register, read, read_one
 
 router = APIRouter(prefix="/api/skills", tags=["skills"])
 
 
+SKILL_DETAIL_QUERY = register("skills.get_skill", """
+    MATCH (s:Skill)-[:GROUPS_SKILL]->(g:SkillGroup)
+    WHERE s.name = $skill_name
+    OPTIONAL MATCH (p:Profession)-[:REQUIRES]->(s)
+    RETURN s.name AS skill_name, s.time AS time, g.name AS group_name, collect(p.name) AS professions, s.id AS id
+    """)
+
+
+GET_SKILLS_QUERY = register("skills.get_skills", """
+    MATCH (s:Skill)-[:GROUPS_SKILL]->(g:SkillGroup)
+    WHERE {condition}
+    RETURN s.name AS skill_name, g.name AS group_name, s.id AS id, s.time AS time, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("")
-async def get_skills():
+@cached
+async def get_skills(limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["s.name_lower", "s.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (s:Skill)-[:GROUPS_SKILL]->(g:SkillGroup)
-                RETURN s.name AS skill_name, g.name AS group_name, s.id AS id, s.time AS time
-                ORDER BY toLower(s.name)
-                """
+        records = await read(driver, GET_SKILLS_QUERY, page.params, **page.template)
+
+        skills = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            skills.append({
+                "skill": record["skill_name"],
+                "skill_group": record["group_name"],
+                "image": image_url,
+                "time": record["time"]
+            })
+
+        if not skills:
+            raise HTTPException(
+                status_code=404,
+                detail="No skills found in the database"
             )
 
-            skills = []
-            for record in result:
-                skill_id = record["id"]
-                static_path = "static/images"
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                # Проверяем существование файла изображения
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{skill_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{skill_id}{ext}"
-                        break
-
-                skills.append({
-                    "skill": record["skill_name"],
-                    "skill_group": record["group_name"],
-                    "image": image_url,
-                    "time": record["time"]
-                })
-
-            if not skills:
-                raise HTTPException(
-                    status_code=404,
-                    detail="No skills found in the database"
-                )
-
-            return skills
+        return page.result(skills)
 
     except HTTPException:
         raise
@@ -58,90 +66,92 @@ async def get_skills():
 @router.get("/{name}")
 async def get_skill(name: str):
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (s:Skill)-[:GROUPS_SKILL]->(g:SkillGroup)
-                WHERE s.name = $skill_name
-                OPTIONAL MATCH (p:Profession)-[:REQUIRES]->(s)
-                RETURN s.name AS skill_name, s.time AS time, g.name AS group_name, collect(p.name) AS professions, s.id AS id
-                """,
-                {"skill_name": name}
+        record = await read_one(driver, SKILL_DETAIL_QUERY, {"skill_name": name})
+        if not record:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Skill with name '{name}' not found"
             )
-            record = result.single()
-            if not record:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Skill with name '{name}' not found"
-                )
-
-            # Определяем расширение изображения
-            skill_id = record["id"]
-            static_path = "static/images"
-            extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-            image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-            for ext in extensions:
-                file_path = os.path.join(static_path, f"{skill_id}{ext}")
-                if os.path.exists(file_path):
-                    image_url = f"http://localhost:8000/static/images/{skill_id}{ext}"
-                    break
-
-            return {
+
+        image_url = get_image_url(record["id"])
+
+        return {
+            "skill": record["skill_name"],
+            "time": record["time"],
+            "skill_group": record["group_name"],
+            "professions": record["professions"],
+            "description": record.get("description", ""),
+            "image": image_url
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch skill: {str(e)}"
+        )
+
+
+SKILL_BATCH_BODY = """
+    RETURN key, n IS NOT NULL AS found, n.name AS skill_name, n.time AS time, n.id AS id,
+           [(n)-[:GROUPS_SKILL]->(g:SkillGroup) | g.name][0] AS group_name,
+           COLLECT { MATCH (p:Profession)-[:REQUIRES]->(n) RETURN p.name } AS professions
+    """
+
+
+@router.post("/batch")
+async def get_skills_batch(request: BatchRequest):
+    """Карточки нескольких навыков одним запросом, по именам и/или id."""
+    try:
+        return await run_batch(driver, "Skill", SKILL_BATCH_BODY, request, lambda record: {
                 "skill": record["skill_name"],
                 "time": record["time"],
                 "skill_group": record["group_name"],
                 "professions": record["professions"],
                 "description": record.get("description", ""),
-                "image": image_url
-            }
-
-    except HTTPException:
-        raise
+                "image": get_image_url(record["id"])
+            })
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to fetch skill: {str(e)}"
+            detail=f"Failed to fetch skills: {str(e)}"
         )
 
+
+GET_SKILLS_SORTED_BY_SKILLGROUPS_QUERY = register("skills.get_skills_sorted_by_skillgroups", """
+    MATCH (s:Skill)-[:GROUPS_SKILL]->(g:SkillGroup)
+    WHERE {condition}
+    RETURN s.name AS skill_name, g.name AS group_name, s.id AS id, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/filter/skillgroups")
-async def get_skills_sorted_by_skillgroups():
+@cached
+async def get_skills_sorted_by_skillgroups(limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["g.name_lower", "s.name_lower", "s.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (s:Skill)-[:GROUPS_SKILL]->(g:SkillGroup)
-                RETURN s.name AS skill_name, g.name AS group_name, s.id AS id
-                ORDER BY toLower(g.name), toLower(s.name)
-                """
+        records = await read(driver, GET_SKILLS_SORTED_BY_SKILLGROUPS_QUERY, page.params, **page.template)
+        skills = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            skills.append({
+                "skill": record["skill_name"],
+                "skill_group": record["group_name"],
+                "image": image_url
+            })
+
+        if not skills:
+            raise HTTPException(
+                status_code=404,
+                detail="No skills found in any skill groups"
             )
-            skills = []
-            for record in result:
-                skill_id = record["id"]
-                static_path = "static/images"
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                # Проверяем существование файла изображения
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{skill_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"/static/images/{skill_id}{ext}"
-                        break
-
-                skills.append({
-                    "skill": record["skill_name"],
-                    "skill_group": record["group_name"],
-                    "image": image_url
-                })
-
-            if not skills:
-                raise HTTPException(
-                    status_code=404,
-                    detail="No skills found in any skill groups"
-                )
-
-            return skills
+
+        return page.result(skills)
 
     except HTTPException:
         raise
@@ -151,74 +161,67 @@ async def get_skills_sorted_by_skillgroups():
             detail=f"Failed to fetch skills grouped by skill groups: {str(e)}"
         )
 
+
+GET_SKILLS_FILTERED_BY_SKILLGROUP_QUERY = register("skills.get_skills_filtered_by_skillgroup", """
+    MATCH (s:Skill)-[:GROUPS_SKILL]->(g:SkillGroup)
+    WHERE g.name = $name AND {condition}
+    RETURN s.name AS skill_name, g.name AS group_name, s.id AS id, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/filter/skillgroups/{name}")
-async def get_skills_filtered_by_skillgroup(name: str):
+@cached
+async def get_skills_filtered_by_skillgroup(name: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["s.name_lower", "s.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (s:Skill)-[:GROUPS_SKILL]->(g:SkillGroup)
-                WHERE g.name = $name
-                RETURN s.name AS skill_name, g.name AS group_name, s.id AS id
-                ORDER BY toLower(s.name)
-                """,
-                {"name": name}
-            )
-            skills = []
-            for record in result:
-                skill_id = record["id"]
-                static_path = "static/images"
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                # Проверяем существование файла изображения
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{skill_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"/static/images/{skill_id}{ext}"
-                        break
-                skills.append({
-                    "skill": record["skill_name"],
-                    "skill_group": record["group_name"],
-                    "image": image_url
-                })
-            return skills
+        records = await read(driver, GET_SKILLS_FILTERED_BY_SKILLGROUP_QUERY, {"name": name, **page.params}, **page.template)
+        skills = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+            skills.append({
+                "skill": record["skill_name"],
+                "skill_group": record["group_name"],
+                "image": image_url
+            })
+        return page.result(skills)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+SEARCH_SKILLS_BY_NAME_QUERY = register("skills.search_skills_by_name", """
+    CALL db.index.fulltext.queryNodes("catalog_fulltext", $search_term) YIELD node AS s, score
+    WHERE s:Skill AND {condition} AND toLower(s.name) CONTAINS toLower($phrase)
+    MATCH (s)-[:GROUPS_SKILL]->(g:SkillGroup)
+    RETURN s.name AS skill_name, g.name AS group_name, s.id AS id, score, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/search/by_name/{search_term}")
-async def search_skills_by_name(search_term: str = ""):
+async def search_skills_by_name(search_term: str = "", limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["-score", "s.name_lower", "s.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (s:Skill)-[:GROUPS_SKILL]->(g:SkillGroup)
-                WHERE toLower(s.name) CONTAINS toLower($search_term)
-                RETURN s.name AS skill_name, g.name AS group_name, s.id AS id
-                ORDER BY toLower(s.name)
-                """,
-                {"search_term": search_term.strip()}
-            )
-            skills = []
-            for record in result:
-                skill_id = record["id"]
-                static_path = "static/images"
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{skill_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{skill_id}{ext}"
-                        break
-
-                skills.append({
-                    "skill": record["skill_name"],
-                    "skill_group": record["group_name"],
-                    "image": image_url
-                })
-
-            return skills
+        query = fulltext_query(search_term, "name")
+        if query is None:
+            return page.result([])
+
+        records = await read(driver, SEARCH_SKILLS_BY_NAME_QUERY, {"search_term": query, "phrase": search_term.strip(), **page.params}, **page.template)
+        skills = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            skills.append({
+                "skill": record["skill_name"],
+                "skill_group": record["group_name"],
+                "image": image_url,
+                "score": record["score"]
+            })
+
+        return page.result(skills)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))       
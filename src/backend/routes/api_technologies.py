@@ -1,43 +1,52 @@
 from fastapi import APIRouter, HTTPException
 from database import driver
-import os
+from images import get_image_url
+from cache import cached
+from pagination import Page, PageLimit, PageCursor
+from utils import fulltext_query
+from batch import BatchRequest, run_batch
+from queries import register, read, read_one
 
 router = APIRouter(prefix="/api/technologies", tags=["technologies"])
 
 
+TECHNOLOGY_DETAIL_QUERY = register("technologies.get_technology", """
+    MATCH (t:Technology)-[:GROUPS_TECH]->(g:TechnologyGroup)
+    WHERE t.name = $technology_name
+    OPTIONAL MATCH (p:Profession)-[:USES_TECH]->(t)
+    RETURN t.name AS technology_name, t.description AS description, g.name AS group_name, collect(p.name) AS professions, t.id AS id
+    """)
+
+
+GET_TECHNOLOGIES_QUERY = register("technologies.get_technologies", """
+    MATCH (t:Technology)-[:GROUPS_TECH]->(g:TechnologyGroup)
+    WHERE {condition}
+    RETURN t.name AS technology_name, t.description AS description, t.time AS time, g.name AS group_name, t.id AS id, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("")
-async def get_technologies():
+@cached
+async def get_technologies(limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["t.name_lower", "t.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Technology)-[:GROUPS_TECH]->(g:TechnologyGroup)
-                RETURN t.name AS technology_name, t.description AS description, t.time AS time, g.name AS group_name, t.id AS id
-                ORDER BY toLower(t.name)
-                """
-            )
-            technologies = []
-            for record in result:
-                tech_id = record["id"]
-                static_path = "static/images"
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                for ext in extensions:
-                    file_path = os.path.join(static_path, f"{tech_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{tech_id}{ext}"
-                        break
-
-                technologies.append({
-                    "technology": record["technology_name"],
-                    "description": record["description"],
-                    "time": record["time"],
-                    "technology_group": record["group_name"],
-                    "image": image_url
-                })
-
-            return technologies
+        records = await read(driver, GET_TECHNOLOGIES_QUERY, page.params, **page.template)
+        technologies = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            technologies.append({
+                "technology": record["technology_name"],
+                "description": record["description"],
+                "time": record["time"],
+                "technology_group": record["group_name"],
+                "image": image_url
+            })
+
+        return page.result(technologies)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -45,178 +54,179 @@ async def get_technologies():
 @router.get("/{name}")
 async def get_technology(name: str):
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Technology)-[:GROUPS_TECH]->(g:TechnologyGroup)
-                WHERE t.name = $technology_name
-                OPTIONAL MATCH (p:Profession)-[:USES_TECH]->(t)
-                RETURN t.name AS technology_name, t.description AS description, g.name AS group_name, collect(p.name) AS professions, t.id AS id
-                """,
-                {"technology_name": name}
-            )
-            record = result.single()
-            if not record:
-                raise HTTPException(status_code=404, detail="The technology not found")
-
-            tech_id = record["id"]
-            extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-            image_url = "http://localhost:8000/static/images/in_progress.jpg"
-            
-            for ext in extensions:
-                if os.path.exists(f"static/images/{tech_id}{ext}"):
-                    image_url = f"http://localhost:8000/static/images/{tech_id}{ext}"
-                    break
-
-            return {
+        record = await read_one(driver, TECHNOLOGY_DETAIL_QUERY, {"technology_name": name})
+        if not record:
+            raise HTTPException(status_code=404, detail="The technology not found")
+
+        image_url = get_image_url(record["id"])
+
+        return {
+            "technology": record["technology_name"],
+            "description": record["description"],
+            "technology_group": record["group_name"],
+            "professions": record["professions"],
+            "image": image_url
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+TECHNOLOGY_BATCH_BODY = """
+    RETURN key, n IS NOT NULL AS found, n.name AS technology_name, n.description AS description, n.id AS id,
+           [(n)-[:GROUPS_TECH]->(g:TechnologyGroup) | g.name][0] AS group_name,
+           COLLECT { MATCH (p:Profession)-[:USES_TECH]->(n) RETURN p.name } AS professions
+    """
+
+
+@router.post("/batch")
+async def get_technologies_batch(request: BatchRequest):
+    """Карточки нескольких технологий одним запросом, по именам и/или id."""
+    try:
+        return await run_batch(driver, "Technology", TECHNOLOGY_BATCH_BODY, request, lambda record: {
                 "technology": record["technology_name"],
                 "description": record["description"],
                 "technology_group": record["group_name"],
                 "professions": record["professions"],
-                "image": image_url
-            }
+                "image": get_image_url(record["id"])
+            })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+GET_TECHNOLOGIES_SORTED_BY_TECHNOLOGYGROUPS_QUERY = register("technologies.get_technologies_sorted_by_technologygroups", """
+    MATCH (t:Technology)-[:GROUPS_TECH]->(g:TechnologyGroup)
+    WHERE {condition}
+    RETURN t.name AS technology_name, t.description AS description, g.name AS group_name, t.id AS id, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/filter/technologygroups")
-async def get_technologies_sorted_by_technologygroups():
+@cached
+async def get_technologies_sorted_by_technologygroups(limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["g.name_lower", "t.name_lower", "t.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Technology)-[:GROUPS_TECH]->(g:TechnologyGroup)
-                RETURN t.name AS technology_name, t.description AS description, g.name AS group_name, t.id AS id
-                ORDER BY toLower(g.name), toLower(t.name)
-                """
-            )
-            technologies = []
-            for record in result:
-                tech_id = record["id"]
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                for ext in extensions:
-                    if os.path.exists(f"static/images/{tech_id}{ext}"):
-                        image_url = f"http://localhost:8000/static/images/{tech_id}{ext}"
-                        break
-
-                technologies.append({
-                    "technology": record["technology_name"],
-                    "description": record["description"],
-                    "technology_group": record["group_name"],
-                    "image": image_url
-                })
-
-            return technologies
+        records = await read(driver, GET_TECHNOLOGIES_SORTED_BY_TECHNOLOGYGROUPS_QUERY, page.params, **page.template)
+        technologies = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            technologies.append({
+                "technology": record["technology_name"],
+                "description": record["description"],
+                "technology_group": record["group_name"],
+                "image": image_url
+            })
+
+        return page.result(technologies)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+GET_TECHNOLOGIES_FILTERED_BY_TECHNOLOGYGROUP_QUERY = register("technologies.get_technologies_filtered_by_technologygroup", """
+    MATCH (t:Technology)-[:GROUPS_TECH]->(g:TechnologyGroup)
+    WHERE g.name = $name AND {condition}
+    RETURN t.name AS technology_name, t.description AS description, g.name AS group_name, t.id AS id, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/filter/technologygroups/{name}")
-async def get_technologies_filtered_by_technologygroup(name: str):
+@cached
+async def get_technologies_filtered_by_technologygroup(name: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["t.name_lower", "t.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Technology)-[:GROUPS_TECH]->(g:TechnologyGroup)
-                WHERE g.name = $name
-                RETURN t.name AS technology_name, t.description AS description, g.name AS group_name, t.id AS id
-                ORDER BY toLower(t.name)
-                """,
-                {"name": name}
-            )
-            technologies = []
-            for record in result:
-                tech_id = record["id"]
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                for ext in extensions:
-                    if os.path.exists(f"static/images/{tech_id}{ext}"):
-                        image_url = f"http://localhost:8000/static/images/{tech_id}{ext}"
-                        break
-
-                technologies.append({
-                    "technology": record["technology_name"],
-                    "description": record["description"],
-                    "technology_group": record["group_name"],
-                    "image": image_url
-                })
-
-            return technologies
+        records = await read(driver, GET_TECHNOLOGIES_FILTERED_BY_TECHNOLOGYGROUP_QUERY, {"name": name, **page.params}, **page.template)
+        technologies = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            technologies.append({
+                "technology": record["technology_name"],
+                "description": record["description"],
+                "technology_group": record["group_name"],
+                "image": image_url
+            })
+
+        return page.result(technologies)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+SEARCH_TECHNOLOGIES_BY_NAME_QUERY = register("technologies.search_technologies_by_name", """
+    CALL db.index.fulltext.queryNodes("catalog_fulltext", $search_term) YIELD node AS t, score
+    WHERE t:Technology AND {condition} AND toLower(t.name) CONTAINS toLower($phrase)
+    MATCH (t)-[:GROUPS_TECH]->(g:TechnologyGroup)
+    RETURN t.name AS technology_name, t.description AS description, g.name AS group_name, t.id AS id, score, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/search/by_name/{search_term}")
-async def search_technologies_by_name(search_term: str = ""):
+async def search_technologies_by_name(search_term: str = "", limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["-score", "t.name_lower", "t.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Technology)-[:GROUPS_TECH]->(g:TechnologyGroup)
-                WHERE toLower(t.name) CONTAINS toLower($search_term)
-                RETURN t.name AS technology_name, t.description AS description, g.name AS group_name, t.id AS id
-                ORDER BY toLower(t.name)
-                """,
-                {"search_term": search_term.strip()}
-            )
-            technologies = []
-            for record in result:
-                tech_id = record["id"]
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                for ext in extensions:
-                    if os.path.exists(f"static/images/{tech_id}{ext}"):
-                        image_url = f"http://localhost:8000/static/images/{tech_id}{ext}"
-                        break
-
-                technologies.append({
-                    "technology": record["technology_name"],
-                    "description": record["description"],
-                    "technology_group": record["group_name"],
-                    "image": image_url
-                })
-
-            return technologies
+        query = fulltext_query(search_term, "name")
+        if query is None:
+            return page.result([])
+
+        records = await read(driver, SEARCH_TECHNOLOGIES_BY_NAME_QUERY, {"search_term": query, "phrase": search_term.strip(), **page.params}, **page.template)
+        technologies = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            technologies.append({
+                "technology": record["technology_name"],
+                "description": record["description"],
+                "technology_group": record["group_name"],
+                "image": image_url,
+                "score": record["score"]
+            })
+
+        return page.result(technologies)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 
+
+SEARCH_TECHNOLOGIES_BY_DESCRIPTION_QUERY = register("technologies.search_technologies_by_description", """
+    CALL db.index.fulltext.queryNodes("catalog_fulltext", $search_term) YIELD node AS t, score
+    WHERE t:Technology AND {condition} AND toLower(coalesce(t.description, "")) CONTAINS toLower($phrase)
+    MATCH (t)-[:GROUPS_TECH]->(g:TechnologyGroup)
+    RETURN t.name AS technology_name, t.description AS description, g.name AS group_name, t.id AS id, score, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/search/by_description/{search_term}")
-async def search_technologies_by_description(search_term: str = ""):
+async def search_technologies_by_description(search_term: str = "", limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["-score", "t.name_lower", "t.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Technology)-[:GROUPS_TECH]->(g:TechnologyGroup)
-                WHERE toLower(t.description) CONTAINS toLower($search_term)
-                RETURN t.name AS technology_name, t.description AS description, g.name AS group_name, t.id AS id
-                ORDER BY toLower(t.name)
-                """,
-                {"search_term": search_term.strip()}
-            )
-            technologies = []
-            for record in result:
-                tech_id = record["id"]
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                for ext in extensions:
-                    file_path = os.path.join("static/images", f"{tech_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{tech_id}{ext}"
-                        break
-
-                technologies.append({
-                    "technology": record["technology_name"],
-                    "description": record["description"],
-                    "technology_group": record["group_name"],
-                    "image": image_url
-                })
-
-            return technologies
+        query = fulltext_query(search_term, "description")
+        if query is None:
+            return page.result([])
+
+        records = await read(driver, SEARCH_TECHNOLOGIES_BY_DESCRIPTION_QUERY, {"search_term": query, "phrase": search_term.strip(), **page.params}, **page.template)
+        technologies = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            technologies.append({
+                "technology": record["technology_name"],
+                "description": record["description"],
+                "technology_group": record["group_name"],
+                "image": image_url,
+                "score": record["score"]
+            })
+
+        return page.result(technologies)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,42 +1,52 @@
 from fastapi import APIRouter, HTTPException
 from database import driver
-import os
+from images import get_image_url
+from cache import cached
+from pagination import Page, PageLimit, PageCursor
+from utils import fulltext_query
+from batch import BatchRequest, run_batch
+from queries import register, read, read_one
 
 router = APIRouter(prefix="/api/tools", tags=["tools"])
 
 
+TOOL_DETAIL_QUERY = register("tools.get_tool", """
+    MATCH (t:Tool)-[:GROUPS_TOOL]->(g:ToolGroup)
+    WHERE t.name = $tool_name
+    OPTIONAL MATCH (p:Profession)-[:USES_TOOL]->(t)
+    RETURN t.name AS tool_name, t.description AS description, g.name AS group_name, collect(p.name) AS professions, t.id AS id
+    """)
+
+
+GET_TOOLS_QUERY = register("tools.get_tools", """
+    MATCH (t:Tool)-[:GROUPS_TOOL]->(g:ToolGroup)
+    WHERE {condition}
+    RETURN t.name AS tool_name, t.description AS description, t.time AS time, g.name AS group_name, t.id AS id, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("")
-async def get_tools():
+@cached
+async def get_tools(limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["t.name_lower", "t.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Tool)-[:GROUPS_TOOL]->(g:ToolGroup)
-                RETURN t.name AS tool_name, t.description AS description, t.time AS time, g.name AS group_name, t.id AS id
-                ORDER BY toLower(t.name)
-                """
-            )
-            tools = []
-            for record in result:
-                tool_id = record["id"]
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                for ext in extensions:
-                    file_path = os.path.join("static/images", f"{tool_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{tool_id}{ext}"
-                        break
-
-                tools.append({
-                    "tool": record["tool_name"],
-                    "description": record["description"],
-                    "time": record["time"],
-                    "tool_group": record["group_name"],
-                    "image": image_url
-                })
-
-            return tools
+        records = await read(driver, GET_TOOLS_QUERY, page.params, **page.template)
+        tools = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            tools.append({
+                "tool": record["tool_name"],
+                "description": record["description"],
+                "time": record["time"],
+                "tool_group": record["group_name"],
+                "image": image_url
+            })
+
+        return page.result(tools)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -44,178 +54,174 @@ async def get_tools():
 @router.get("/{name}")
 async def get_tool(name: str):
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Tool)-[:GROUPS_TOOL]->(g:ToolGroup)
-                WHERE t.name = $tool_name
-                OPTIONAL MATCH (p:Profession)-[:USES_TOOL]->(t)
-                RETURN t.name AS tool_name, t.description AS description, g.name AS group_name, collect(p.name) AS professions, t.id AS id
-                """,
-                {"tool_name": name}
-            )
-            record = result.single()
-            if not record:
-                raise HTTPException(status_code=404, detail="Tool not found")
-
-            tool_id = record["id"]
-            extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-            image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-            for ext in extensions:
-                file_path = os.path.join("static/images", f"{tool_id}{ext}")
-                if os.path.exists(file_path):
-                    image_url = f"http://localhost:8000/static/images/{tool_id}{ext}"
-                    break
-
-            return {
+        record = await read_one(driver, TOOL_DETAIL_QUERY, {"tool_name": name})
+        if not record:
+            raise HTTPException(status_code=404, detail="Tool not found")
+
+        image_url = get_image_url(record["id"])
+
+        return {
+            "tool": record["tool_name"],
+            "description": record["description"],
+            "tool_group": record["group_name"],
+            "professions": record["professions"],
+            "image": image_url
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+TOOL_BATCH_BODY = """
+    RETURN key, n IS NOT NULL AS found, n.name AS tool_name, n.description AS description, n.id AS id,
+           [(n)-[:GROUPS_TOOL]->(g:ToolGroup) | g.name][0] AS group_name,
+           COLLECT { MATCH (p:Profession)-[:USES_TOOL]->(n) RETURN p.name } AS professions
+    """
+
+
+@router.post("/batch")
+async def get_tools_batch(request: BatchRequest):
+    """Карточки нескольких инструментов одним запросом, по именам и/или id."""
+    try:
+        return await run_batch(driver, "Tool", TOOL_BATCH_BODY, request, lambda record: {
                 "tool": record["tool_name"],
                 "description": record["description"],
                 "tool_group": record["group_name"],
                 "professions": record["professions"],
-                "image": image_url
-            }
+                "image": get_image_url(record["id"])
+            })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+GET_TOOLS_SORTED_BY_TOOLGROUPS_QUERY = register("tools.get_tools_sorted_by_toolgroups", """
+    MATCH (t:Tool)-[:GROUPS_TOOL]->(g:ToolGroup)
+    WHERE {condition}
+    RETURN t.name AS tool_name, t.description AS description, g.name AS group_name , t.id AS id, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/filter/toolgroups")
-async def get_tools_sorted_by_toolgroups():
+@cached
+async def get_tools_sorted_by_toolgroups(limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["g.name_lower", "t.name_lower", "t.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Tool)-[:GROUPS_TOOL]->(g:ToolGroup)
-                RETURN t.name AS tool_name, t.description AS description, g.name AS group_name , t.id AS id
-                ORDER BY toLower(g.name), toLower(t.name)
-                """
-            )
-            tools = []
-            for record in result:
-                tool_id = record["id"]
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                for ext in extensions:
-                    file_path = os.path.join("static/images", f"{tool_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{tool_id}{ext}"
-                        break
-
-                tools.append({
-                    "tool": record["tool_name"],
-                    "description": record["description"],
-                    "tool_group": record["group_name"],
-                    "image": image_url
-                })
-
-            return tools
+        records = await read(driver, GET_TOOLS_SORTED_BY_TOOLGROUPS_QUERY, page.params, **page.template)
+        tools = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+
+            tools.append({
+                "tool": record["tool_name"],
+                "description": record["description"],
+                "tool_group": record["group_name"],
+                "image": image_url
+            })
+
+        return page.result(tools)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+GET_TOOLS_FILTERED_BY_TOOLGROUP_QUERY = register("tools.get_tools_filtered_by_toolgroup", """
+    MATCH (t:Tool)-[:GROUPS_TOOL]->(g:ToolGroup)
+    WHERE g.name = $name AND {condition}
+    RETURN t.name AS tool_name, t.description AS description, g.name AS group_name, t.id AS id, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/filter/toolgroups/{name}")
-async def get_tools_filtered_by_toolgroup(name: str):
+@cached
+async def get_tools_filtered_by_toolgroup(name: str, limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["t.name_lower", "t.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Tool)-[:GROUPS_TOOL]->(g:ToolGroup)
-                WHERE g.name = $name
-                RETURN t.name AS tool_name, t.description AS description, g.name AS group_name, t.id AS id
-                ORDER BY toLower(t.name)
-                """,
-                {"name": name}
-            )
-            tools = []
-            for record in result:
-                tool_id = record["id"]
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                for ext in extensions:
-                    file_path = os.path.join("static/images", f"{tool_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{tool_id}{ext}"
-                        break
-                tools.append({
-                    "tool": record["tool_name"],
-                    "description": record["description"],
-                    "tool_group": record["group_name"],
-                    "image": image_url
-                })
-            return tools
+        records = await read(driver, GET_TOOLS_FILTERED_BY_TOOLGROUP_QUERY, {"name": name, **page.params}, **page.template)
+        tools = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+            tools.append({
+                "tool": record["tool_name"],
+                "description": record["description"],
+                "tool_group": record["group_name"],
+                "image": image_url
+            })
+        return page.result(tools)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+SEARCH_TOOLS_BY_NAME_QUERY = register("tools.search_tools_by_name", """
+    CALL db.index.fulltext.queryNodes("catalog_fulltext", $search_term) YIELD node AS t, score
+    WHERE t:Tool AND {condition} AND toLower(t.name) CONTAINS toLower($phrase)
+    MATCH (t)-[:GROUPS_TOOL]->(g:ToolGroup)
+    RETURN t.name AS tool_name, t.description AS description, g.name AS group_name, t.id AS id, score, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/search/by_name/{search_term}")
-async def search_tools_by_name(search_term: str = ""):
+async def search_tools_by_name(search_term: str = "", limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["-score", "t.name_lower", "t.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Tool)-[:GROUPS_TOOL]->(g:ToolGroup)
-                WHERE toLower(t.name) CONTAINS toLower($search_term)
-                RETURN t.name AS tool_name, t.description AS description, g.name AS group_name, t.id AS id
-                ORDER BY toLower(t.name)
-                """,
-                {"search_term": search_term.strip()}
-            )
-            tools = []
-            for record in result:
-                tool_id = record["id"]
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                for ext in extensions:
-                    file_path = os.path.join("static/images", f"{tool_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{tool_id}{ext}"
-                        break
-                tools.append({
-                    "tool": record["tool_name"],
-                    "description": record["description"],
-                    "tool_group": record["group_name"],
-                    "image": image_url
-                })
-            return tools
+        query = fulltext_query(search_term, "name")
+        if query is None:
+            return page.result([])
+
+        records = await read(driver, SEARCH_TOOLS_BY_NAME_QUERY, {"search_term": query, "phrase": search_term.strip(), **page.params}, **page.template)
+        tools = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+            tools.append({
+                "tool": record["tool_name"],
+                "description": record["description"],
+                "tool_group": record["group_name"],
+                "image": image_url,
+                "score": record["score"]
+            })
+        return page.result(tools)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+SEARCH_TOOLS_BY_DESCRIPTION_QUERY = register("tools.search_tools_by_description", """
+    CALL db.index.fulltext.queryNodes("catalog_fulltext", $search_term) YIELD node AS t, score
+    WHERE t:Tool AND {condition} AND toLower(coalesce(t.description, "")) CONTAINS toLower($phrase)
+    MATCH (t)-[:GROUPS_TOOL]->(g:ToolGroup)
+    RETURN t.name AS tool_name, t.description AS description, g.name AS group_name, t.id AS id, score, {sort_key} AS sort_key
+    ORDER BY {order_by}
+    {limit_clause}
+    """)
+
+
 @router.get("/search/by_description/{search_term}")
-async def search_tools_by_description(search_term: str = ""):
+async def search_tools_by_description(search_term: str = "", limit: int | None = PageLimit, cursor: str | None = PageCursor):
+    page = Page(limit, cursor, ["-score", "t.name_lower", "t.id"])
     try:
-        with driver.session() as session:
-            result = session.run(
-                """
-                MATCH (t:Tool)-[:GROUPS_TOOL]->(g:ToolGroup)
-                WHERE toLower(t.description) CONTAINS toLower($search_term)
-                RETURN t.name AS tool_name, t.description AS description, g.name AS group_name, t.id AS id
-                ORDER BY toLower(t.name)
-                """,
-                {"search_term": search_term.strip()}
-            )
-            tools = []
-            for record in result:
-                tool_id = record["id"]
-                extensions = ['.jpg', '.jpeg', '.png', '.webp', '.gif', '.svg']
-                image_url = "http://localhost:8000/static/images/in_progress.jpg"
-
-                for ext in extensions:
-                    file_path = os.path.join("static/images", f"{tool_id}{ext}")
-                    if os.path.exists(file_path):
-                        image_url = f"http://localhost:8000/static/images/{tool_id}{ext}"
-                        break
-                tools.append({
-                    "tool": record["tool_name"],
-                    "description": record["description"],
-                    "tool_group": record["group_name"],
-                    "image": image_url
-                })
-            return tools
+        query = fulltext_query(search_term, "description")
+        if query is None:
+            return page.result([])
+
+        records = await read(driver, SEARCH_TOOLS_BY_DESCRIPTION_QUERY, {"search_term": query, "phrase": search_term.strip(), **page.params}, **page.template)
+        tools = []
+        for record in records:
+            page.track(record["sort_key"])
+            image_url = get_image_url(record["id"])
+            tools.append({
+                "tool": record["tool_name"],
+                "description": record["description"],
+                "tool_group": record["group_name"],
+                "image": image_url,
+                "score": record["score"]
+            })
+        return page.result(tools)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
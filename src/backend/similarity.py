@@ -0,0 +1,103 @@
+import asyncio
+import os
+import numpy as np
+from scipy import sparse
+from fastapi.concurrency import run_in_threadpool
+
+# Сколько ближайших профессий хранится для каждой профессии
+SIMILAR_MAX_K = int(os.getenv("SIMILAR_MAX_K", "50"))
+# Сколько строк матрицы сходства считается за раз: память - SIMILAR_BLOCK_SIZE x профессий
+SIMILAR_BLOCK_SIZE = int(os.getenv("SIMILAR_BLOCK_SIZE", "256"))
+
+# Связи, по которым профессия описывается признаками
+FEATURE_RELATIONSHIPS = ["REQUIRES", "USES_TECH", "USES_TOOL"]
+SIMILARITY_METRICS = ("jaccard", "cosine")
+
+
+class Similarity:
+    """Ближайшие профессии по общим навыкам, технологиям и инструментам для одного снимка графа."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.professions = np.flatnonzero(snapshot.labels == snapshot.label_code("Profession"))
+        self.rows = {snapshot.properties[p].get("name"): row for row, p in enumerate(self.professions.tolist())}
+
+        self.categories = {}
+        for source, target in zip(*(a.tolist() for a in snapshot.out_edges(self.professions, ["BELONGS_TO"])[:2])):
+            self.categories.setdefault(source, snapshot.properties[target].get("name"))
+
+        sources, targets, _ = snapshot.out_edges(self.professions, FEATURE_RELATIONSHIPS)
+        features, columns = np.unique(targets, return_inverse=True)
+        row_of = np.zeros(snapshot.node_count, dtype=np.int64)
+        row_of[self.professions] = np.arange(len(self.professions))
+
+        # Матрица инцидентности профессия x признак; повторные связи схлопываются в 1
+        incidence = sparse.csr_matrix(
+            (np.ones(len(sources)), (row_of[sources], columns)),
+            shape=(len(self.professions), len(features))
+        )
+        incidence.sum_duplicates()
+        incidence.data[:] = 1
+        sizes = np.asarray(incidence.sum(axis=1)).ravel()
+
+        # Полная матрица профессия x профессия не строится: строки считаются блоками,
+        # и от каждой строки остаются только k лучших соседей
+        count = len(self.professions)
+        k = min(SIMILAR_MAX_K, max(count - 1, 0))
+        self.neighbors = {metric: np.zeros((count, k), dtype=np.int64) for metric in SIMILARITY_METRICS}
+        self.scores = {metric: np.zeros((count, k)) for metric in SIMILARITY_METRICS}
+        self.shared = {metric: np.zeros((count, k), dtype=np.int64) for metric in SIMILARITY_METRICS}
+        transposed = incidence.T.tocsr()
+        for start in range(0, count if k else 0, SIMILAR_BLOCK_SIZE):
+            rows = np.arange(start, min(start + SIMILAR_BLOCK_SIZE, count))
+            shared = (incidence[start:start + len(rows)] @ transposed).toarray()
+            denominators = {
+                "jaccard": sizes[rows, None] + sizes[None, :] - shared,
+                "cosine": np.sqrt(sizes[rows, None] * sizes[None, :]),
+            }
+            for metric, denominator in denominators.items():
+                # Сходство со знаком минус, чтобы лучшие были первыми; без признаков - 0, а не NaN
+                matrix = np.divide(-shared, denominator, out=np.zeros_like(shared), where=denominator > 0)
+                matrix[np.arange(len(rows)), rows] = 1
+                # k-е по величине значение строки; из равных ему берутся профессии с меньшими номерами
+                threshold = np.partition(matrix, k - 1, axis=1)[:, k - 1:k]
+                better, ties = matrix < threshold, matrix == threshold
+                missing = k - better.sum(axis=1, keepdims=True)
+                selected = better | (ties & (np.cumsum(ties, axis=1) <= missing))
+                top = np.nonzero(selected)[1].reshape(len(rows), k)
+                # Отобранные k соседей сортируются по убыванию сходства, при равенстве - по номеру
+                top_scores = np.take_along_axis(matrix, top, axis=1)
+                order = np.lexsort((top, top_scores), axis=1)
+                top = np.take_along_axis(top, order, axis=1)
+                self.neighbors[metric][rows] = top
+                self.scores[metric][rows] = -np.take_along_axis(top_scores, order, axis=1)
+                self.shared[metric][rows] = np.take_along_axis(shared, top, axis=1)
+
+    def similar(self, name, metric, k):
+        row = self.rows.get(name)
+        if row is None:
+            return None
+        result = []
+        neighbors = self.neighbors[metric][row, :k].tolist()
+        for column, score, shared in zip(neighbors, self.scores[metric][row, :k].tolist(),
+                                         self.shared[metric][row, :k].tolist()):
+            if score <= 0:
+                break
+            result.append((int(self.professions[column]), score, shared))
+        return result
+
+
+_similarity = None
+_lock = asyncio.Lock()
+
+
+async def get_similarity(snapshot):
+    """Матрицы сходства для снимка графа; пересчитываются один раз на версию каталога."""
+    global _similarity
+    similarity = _similarity
+    if similarity is not None and similarity.snapshot is snapshot:
+        return similarity
+    async with _lock:
+        if _similarity is None or _similarity.snapshot is not snapshot:
+            _similarity = await run_in_threadpool(Similarity, snapshot)
+        return _similarity
@@ -0,0 +1,167 @@
+"""Журнал медленных запросов Cypher.
+
+Запросы дольше SLOW_QUERY_THRESHOLD_MS записываются JSON-строкой: имя запроса, маршрут,
+форма параметров (типы и размеры, без значений), число строк и тайминги. Каждый воркер
+пишет свой файл с ротацией; запуск модуля сводит все файлы и печатает худшие запросы:
+
+    python slow_queries.py --top 20 --by total
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_LOG_DIR = os.getenv("SLOW_QUERY_LOG_DIR", "logs")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+# Снимать ли план EXPLAIN для медленного запроса (отдельным запросом в фоне)
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "0") == "1"
+
+# scope текущего HTTP-запроса; роутер дописывает в него найденный маршрут
+current_scope = ContextVar("current_scope", default=None)
+
+_logger = None
+_explain_driver = None
+_pending = set()
+
+
+def enable_query_plans(driver):
+    """Драйвер для фоновых EXPLAIN; без него планы не снимаются."""
+    global _explain_driver
+    _explain_driver = driver
+
+
+def get_logger():
+    global _logger
+    if _logger is None:
+        os.makedirs(SLOW_QUERY_LOG_DIR, exist_ok=True)
+        # Отдельный файл на процесс: воркеры gunicorn не мешают друг другу при ротации
+        handler = RotatingFileHandler(
+            os.path.join(SLOW_QUERY_LOG_DIR, f"slow_queries.{os.getpid()}.log"),
+            maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+            backupCount=SLOW_QUERY_LOG_BACKUPS,
+            encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger = logging.getLogger("slow_queries")
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        _logger.addHandler(handler)
+    return _logger
+
+
+def parameter_shapes(parameters):
+    shapes = {}
+    for key, value in (parameters or {}).items():
+        if isinstance(value, (list, tuple, dict, str)):
+            shapes[key] = f"{type(value).__name__}[{len(value)}]"
+        else:
+            shapes[key] = type(value).__name__
+    return shapes
+
+
+def current_route():
+    scope = current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope.get('method', '')} {getattr(route, 'path', scope.get('path'))}".strip()
+
+
+def plan_tree(plan):
+    return {
+        "operator": plan.get("operatorType"),
+        "estimated_rows": plan.get("args", {}).get("EstimatedRows"),
+        "children": [plan_tree(child) for child in plan.get("children", [])],
+    }
+
+
+async def _explain_and_log(entry, query, parameters):
+    try:
+        async with _explain_driver.session() as session:
+            result = await session.run("EXPLAIN " + query, parameters)
+            summary = await result.consume()
+            entry["plan"] = plan_tree(summary.plan) if summary.plan else None
+    except Exception as e:
+        entry["plan_error"] = str(e)
+    get_logger().info(json.dumps(entry, ensure_ascii=False))
+
+
+def record(name, query, parameters, elapsed_ms, rows, summary):
+    """Вызывается оберткой запросов после чтения результата; пишет запись, если запрос медленный."""
+    if elapsed_ms < SLOW_QUERY_THRESHOLD_MS:
+        return
+    entry = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "query": name,
+        "route": current_route(),
+        "elapsed_ms": round(elapsed_ms, 2),
+        "available_after_ms": summary.result_available_after if summary else None,
+        "consumed_after_ms": summary.result_consumed_after if summary else None,
+        "rows": rows,
+        "parameters": parameter_shapes(parameters),
+    }
+    if SLOW_QUERY_EXPLAIN and _explain_driver is not None:
+        task = asyncio.create_task(_explain_and_log(entry, query, parameters))
+        _pending.add(task)
+        task.add_done_callback(_pending.discard)
+    else:
+        get_logger().info(json.dumps(entry, ensure_ascii=False))
+
+
+def read_entries(log_dir):
+    for path in glob.glob(os.path.join(log_dir, "slow_queries.*.log*")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def aggregate(entries):
+    groups = defaultdict(list)
+    for entry in entries:
+        groups[(entry.get("query"), entry.get("route"))].append(entry)
+
+    rows = []
+    for (query, route), items in groups.items():
+        elapsed = sorted(item["elapsed_ms"] for item in items)
+        rows.append({
+            "query": query,
+            "route": route,
+            "count": len(items),
+            "total_ms": round(sum(elapsed), 1),
+            "max_ms": elapsed[-1],
+            "p95_ms": elapsed[min(len(elapsed) - 1, int(0.95 * len(elapsed)))],
+            "mean_rows": round(sum(item.get("rows") or 0 for item in items) / len(items), 1),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate the slow query log and print the worst offenders")
+    parser.add_argument("--log-dir", default=SLOW_QUERY_LOG_DIR)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--by", choices=["total", "max", "p95", "count"], default="total")
+    args = parser.parse_args()
+
+    rows = aggregate(read_entries(args.log_dir))
+    key = "count" if args.by == "count" else f"{args.by}_ms"
+    rows.sort(key=lambda row: row[key], reverse=True)
+
+    print(f"{'query':40} {'route':45} {'count':>6} {'total ms':>10} {'max ms':>9} {'p95 ms':>9} {'rows':>7}")
+    for row in rows[:args.top]:
+        print(f"{str(row['query']):40} {str(row['route']):45} {row['count']:>6} {row['total_ms']:>10} "
+              f"{row['max_ms']:>9} {row['p95_ms']:>9} {row['mean_rows']:>7}")
+
+
+if __name__ == "__main__":
+    main()
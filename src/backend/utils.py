@@ -1,44 +1,188 @@
-from neo4j import GraphDatabase
+import re
 from datetime import datetime, timezone, timedelta
+from collections import defaultdict
+from queries import write_session
+from metrics import run_query
 
-def delete_nodes(driver):
-    with driver.session() as session:
-        session.run("MATCH (n) DETACH DELETE n")
+CATALOG_LABELS = [
+    "Profession", "Skill", "Technology", "Tool",
+    "Category", "SkillGroup", "TechnologyGroup", "ToolGroup",
+]
 
-def create_node(tx, label, properties):
-    query = f"CREATE (n:{label} $properties)"
-    tx.run(query, properties=properties)
+# Метки начального и конечного узла для каждого типа связи каталога
+RELATIONSHIP_LABELS = {
+    "BELONGS_TO": ("Profession", "Category"),
+    "REQUIRES": ("Profession", "Skill"),
+    "USES_TECH": ("Profession", "Technology"),
+    "USES_TOOL": ("Profession", "Tool"),
+    "GROUPS_SKILL": ("Skill", "SkillGroup"),
+    "GROUPS_TECH": ("Technology", "TechnologyGroup"),
+    "GROUPS_TOOL": ("Tool", "ToolGroup"),
+}
 
-def create_relationship(tx, start_node_id, end_node_id, relationship_type):
-    query = """
-    MATCH (a), (b)
-    WHERE a.id = $start_node_id AND b.id = $end_node_id
-    CREATE (a)-[r:%s]->(b)
+# Имя в нижнем регистре хранится отдельным свойством с индексом: по нему сортируются списки
+# и ищется продолжение страницы (выражение toLower(n.name) индекс не обслуживает).
+# Заполняется при каждом создании и изменении узла; в ответы и экспорт не попадает
+NAME_KEY = "name_lower"
+
+SCHEMA_QUERIES = [
+    f"CREATE CONSTRAINT {label.lower()}_id_unique IF NOT EXISTS "
+    f"FOR (n:{label}) REQUIRE n.id IS UNIQUE"
+    for label in CATALOG_LABELS
+] + [
+    f"CREATE INDEX {label.lower()}_name_index IF NOT EXISTS "
+    f"FOR (n:{label}) ON (n.name)"
+    for label in CATALOG_LABELS
+] + [
+    f"CREATE INDEX {label.lower()}_{NAME_KEY}_index IF NOT EXISTS "
+    f"FOR (n:{label}) ON (n.{NAME_KEY})"
+    for label in CATALOG_LABELS
+]
+
+SCHEMA_QUERIES.append(
+    "CREATE CONSTRAINT catalogversion_id_unique IF NOT EXISTS "
+    "FOR (n:CatalogVersion) REQUIRE n.id IS UNIQUE"
+)
+
+FULLTEXT_INDEX = "catalog_fulltext"
+
+SCHEMA_QUERIES.append(
+    f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} IF NOT EXISTS "
+    f"FOR (n:{'|'.join(CATALOG_LABELS)}) ON EACH [n.name, n.description]"
+)
+
+def set_name_key(variable="n"):
+    return f"SET {variable}.{NAME_KEY} = toLower({variable}.name)"
+
+# Заполняет ключ сортировки у узлов, созданных до его появления или измененных в обход API
+BACKFILL_NAME_KEY_QUERY = f"""
+    MATCH (n) WHERE ({" OR ".join(f"n:{label}" for label in CATALOG_LABELS)})
+      AND n.name IS NOT NULL AND (n.{NAME_KEY} IS NULL OR n.{NAME_KEY} <> toLower(n.name))
+    CALL {{ WITH n {set_name_key()} }} IN TRANSACTIONS OF 10000 ROWS
+    """
+
+def fulltext_query(search_term, field):
+    """Строит запрос Lucene к полнотекстовому индексу по полю name или description.
+
+    Каждое слово ищется как точное совпадение, префикс и подстрока (в порядке
+    убывания веса), все слова обязательны. Возвращает None, если в строке нет слов.
+
+    Индекс только отбирает кандидатов и задает порядок: анализатор Lucene отбрасывает
+    пунктуацию ("C++" и "C#" для него - просто "c") и не учитывает порядок слов.
+    Поэтому запросы маршрутов дополнительно проверяют toLower(поле) CONTAINS toLower($phrase)
+    для исходной строки, как прежний поиск. В Lucene попадают только слова (\w+),
+    так что спецсимволы запроса Lucene экранировать не нужно.
+    """
+    words = re.findall(r"\w+", search_term.lower())
+    if not words:
+        return None
+    return " AND ".join(f"{field}:({word}^3 OR {word}*^2 OR *{word}*)" for word in words)
+
+def relationship_endpoints(relationship_type):
+    """Возвращает метки концов связи вида (":Profession", ":Skill"), чтобы MATCH шел по индексу id."""
+    start_label, end_label = RELATIONSHIP_LABELS.get(relationship_type, (None, None))
+    return (f":{start_label}" if start_label else "", f":{end_label}" if end_label else "")
+
+def create_relationship_query(relationship_type):
+    start_label, end_label = relationship_endpoints(relationship_type)
+    return f"""
+    MATCH (a{start_label} {{id: $start_node_id}})
+    MATCH (b{end_label} {{id: $end_node_id}})
+    CREATE (a)-[r:{relationship_type}]->(b)
     RETURN r
-    """ % relationship_type
-    tx.run(query, start_node_id=start_node_id, end_node_id=end_node_id)
+    """
+
+async def delete_nodes(driver):
+    async with write_session(driver) as session:
+        # Узел версии каталога не удаляется, чтобы версия только росла
+        result = await run_query(session, "utils.delete_nodes", "MATCH (n) WHERE NOT n:CatalogVersion DETACH DELETE n")
+        await result.consume()
+
+async def create_node(tx, label, properties):
+    query = f"CREATE (n:{label} $properties) {set_name_key()}"
+    result = await run_query(tx, "utils.create_node", query, properties=properties)
+    await result.consume()
 
-def check_node_exists(tx,label: str, name):
-    query = f"MATCH (p:{label}) WHERE toLower(p.name) = toLower($name) RETURN p LIMIT 1"
-    result = tx.run(query, name=name)
-    return result.single() is not None
+async def create_relationship(tx, start_node_id, end_node_id, relationship_type):
+    query = create_relationship_query(relationship_type)
+    result = await run_query(tx, "utils.create_relationship", query,
+                             start_node_id=start_node_id, end_node_id=end_node_id)
+    await result.consume()
+
+async def check_node_exists(tx,label: str, name):
+    query = f"MATCH (p:{label}) WHERE p.{NAME_KEY} = toLower($name) RETURN p LIMIT 1"
+    result = await run_query(tx, "utils.check_node_exists", query, {"name": name})
+    return await result.single() is not None
     
-def update_node(tx, old_name, new_name, new_label, new_properties):
-    query = (
-        "MATCH (n) "
-        "WHERE n.name=$old_name "
-        "SET n.label = $new_label, n.name = $new_name, n += $new_properties "
-        "RETURN n "
+def group_by_type(relationships):
+    """Связи из payload редактирования по типам: {тип: [{"startNode": id, "endNode": id}]}."""
+    rows_by_type = defaultdict(list)
+    for rel in relationships:
+        rows_by_type[rel["type"]].append({"startNode": rel["startNode"], "endNode": rel["endNode"]})
+    return rows_by_type
+
+async def update_nodes(tx, old_label, label, nodes):
+    """Обновляет узлы одной метки по id (индекс уникальности); при old_label != label меняет саму метку."""
+    relabel = f"REMOVE n:{old_label} SET n:{label}" if old_label != label else ""
+    result = await run_query(tx, "utils.update_nodes",
+        f"""
+        UNWIND $nodes AS node
+        MATCH (n:{old_label} {{id: node.id}})
+        SET n += node.properties
+        {set_name_key()}
+        REMOVE n.label
+        {relabel}
+        RETURN node.id AS id, node.old_name AS old_name, n.name AS name, '{label}' AS label
+        """,
+        nodes=nodes
     )
-    tx.run(query, old_name=old_name, new_name=new_name, new_label=new_label, new_properties=new_properties)
+    return [record.data() async for record in result]
 
-def delete_relationship(tx, start_node_id, end_node_id, rel_type):
-    query = (
-        "MATCH (a)-[r:%s]->(b) "
-        "WHERE a.id = $start_node_id AND b.id = $end_node_id "
-        "DELETE r" % rel_type
+async def add_relationships(tx, relationship_type, rows):
+    start_label, end_label = relationship_endpoints(relationship_type)
+    result = await run_query(tx, "utils.add_relationships",
+        f"""
+        UNWIND $rows AS row
+        MATCH (a{start_label} {{id: row.startNode}})
+        MATCH (b{end_label} {{id: row.endNode}})
+        CREATE (a)-[:{relationship_type}]->(b)
+        RETURN row.startNode AS startNode, row.endNode AS endNode
+        """,
+        rows=rows
     )
-    tx.run(query, start_node_id=start_node_id, end_node_id=end_node_id)
+    return [{**record.data(), "type": relationship_type} async for record in result]
+
+async def remove_relationships(tx, relationship_type, rows):
+    start_label, end_label = relationship_endpoints(relationship_type)
+    result = await run_query(tx, "utils.remove_relationships",
+        f"""
+        UNWIND $rows AS row
+        MATCH (a{start_label} {{id: row.startNode}})-[r:{relationship_type}]->(b{end_label} {{id: row.endNode}})
+        DELETE r
+        RETURN DISTINCT row.startNode AS startNode, row.endNode AS endNode
+        """,
+        rows=rows
+    )
+    return [{**record.data(), "type": relationship_type} async for record in result]
+
+async def apply_edit(tx, nodes, added, removed):
+    """Применяет правку целиком в одной транзакции и возвращает то, что реально изменилось.
+
+    Узлы обновляются одним UNWIND на пару меток, связи - одним UNWIND на тип
+    (метки и тип связи в Cypher не параметризуются).
+    Связи, концы которых не найдены, в ответ не попадают.
+    """
+    applied = {"nodes": [], "added": [], "removed": []}
+    nodes_by_label = defaultdict(list)
+    for node in nodes:
+        nodes_by_label[(node["old_label"], node["label"])].append(node)
+    for (old_label, label), rows in nodes_by_label.items():
+        applied["nodes"] += await update_nodes(tx, old_label, label, rows)
+    for relationship_type, rows in group_by_type(added).items():
+        applied["added"] += await add_relationships(tx, relationship_type, rows)
+    for relationship_type, rows in group_by_type(removed).items():
+        applied["removed"] += await remove_relationships(tx, relationship_type, rows)
+    return applied
 
 def get_utc3_time():
     utc_time = datetime.now(timezone.utc)
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import './GroupModal.css';
-import { getIdByName, fetchProfessions, fetchSkills, fetchTechnologies, fetchTools } from '../../services/api';
+import { getIdByName, getIdsByNames, fetchProfessions, fetchSkills, fetchTechnologies, fetchTools } from '../../services/api';
 
 const GroupModal = ({ isOpen, onClose, group, onEdit, loading, groupType, label, participantType }) => {
   const [isEditing, setIsEditing] = useState(false);
@@ -92,14 +92,19 @@ const GroupModal = ({ isOpen, onClose, group, onEdit, loading, groupType, label,
         formData.append('image', editedData.imageFile);
       }
 
-      const groupId = await getIdByName(group.name);
+      const groupId = await getIdByName(group.name, label);
       if (!groupId) {
         throw new Error(`Не удалось получить ID для группы: ${group.name}`);
       }
   
+      const ids = await getIdsByNames([
+        ...editedData.participants,
+        ...(group.participants || [])
+      ]);
+  
       const getItemId = async (itemName) => {
         try {
-          const id = await getIdByName(itemName);
+          const id = ids[itemName];
           if (!id) {
             console.warn(`Не найден ID для: ${itemName}`);
             return null;
@@ -1,7 +1,8 @@
 import React, { useState, useEffect, useRef } from 'react';
 import './ProfessionModal.css';
 import { 
-  getIdByName
+  getIdByName,
+  getIdsByNames
 } from '../../services/api';
 
 const ProfessionModal = ({ isOpen, onClose, profession, onEdit, allSkills, allTechnologies, allTools, setSelectedProfession }) => {
@@ -88,7 +89,7 @@ const ProfessionModal = ({ isOpen, onClose, profession, onEdit, allSkills, allTe
 
   const handleSaveClick = async () => {
     try {
-      const professionId = await getIdByName(profession.profession);
+      const professionId = await getIdByName(profession.profession, 'Profession');
       if (!professionId) {
         throw new Error(`Не удалось получить ID для профессии: ${profession.profession}`);
       }
@@ -113,8 +114,17 @@ const ProfessionModal = ({ isOpen, onClose, profession, onEdit, allSkills, allTe
         professionNode.properties.image = editedData.image;
       }
   
+      const ids = await getIdsByNames([
+        ...(editedData.skills || []),
+        ...(profession.skills?.map(getDisplayName) || []),
+        ...(editedData.technologies || []),
+        ...(profession.technologies?.map(getDisplayName) || []),
+        ...(editedData.tools || []),
+        ...(profession.tools?.map(getDisplayName) || [])
+      ]);
+
       const getItemId = async (itemName) => {
-        const id = await getIdByName(itemName);
+        const id = ids[itemName];
         if (!id) console.warn(`Не найден ID для: ${itemName}`);
         return id;
       };
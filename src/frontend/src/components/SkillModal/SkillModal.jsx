@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import './SkillModal.css';
-import { getIdByName, fetchProfessions } from '../../services/api';
+import { getIdByName, getIdsByNames, fetchProfessions } from '../../services/api';
 
 const SkillModal = ({ skill, onClose, onEdit, allGroups, loading }) => {
   const [isEditing, setIsEditing] = useState(false);
@@ -84,14 +84,21 @@ const SkillModal = ({ skill, onClose, onEdit, allGroups, loading }) => {
 
       const oldSkillName = skill.skill;
       
-      const skillId = await getIdByName(oldSkillName);
+      const skillId = await getIdByName(oldSkillName, 'Skill');
       if (!skillId) {
         throw new Error(`Не удалось получить ID для навыка: ${oldSkillName}`);
       }
   
+      const ids = await getIdsByNames([
+        editedData.group,
+        skill.skill_group,
+        ...editedData.professions,
+        ...(skill.professions || [])
+      ]);
+  
       const getItemId = async (itemName) => {
         if (!itemName) return null;
-        const id = await getIdByName(itemName);
+        const id = ids[itemName];
         if (!id) console.warn(`Не найден ID для: ${itemName}`);
         return id;
       };
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import './TechnologyModal.css';
-import { getIdByName, fetchProfessions, fetchGroups } from '../../services/api';
+import { getIdByName, getIdsByNames, fetchProfessions, fetchGroups } from '../../services/api';
 
 const TechnologyModal = ({ isOpen, onClose, technology, onEdit, loading }) => {
   const [isEditing, setIsEditing] = useState(false);
@@ -88,13 +88,20 @@ const TechnologyModal = ({ isOpen, onClose, technology, onEdit, loading }) => {
         formData.append('image', editedData.imageFile);
       }
 
-      const technologyId = await getIdByName(technology.technology);
+      const technologyId = await getIdByName(technology.technology, 'Technology');
       if (!technologyId) {
         throw new Error(`Не удалось получить ID для технологии: ${technology.technology}`);
       }
 
+      const ids = await getIdsByNames([
+        editedData.group,
+        technology.technology_group,
+        ...editedData.professions,
+        ...(technology.professions || [])
+      ]);
+
       const getItemId = async (itemName) => {
-        const id = await getIdByName(itemName);
+        const id = ids[itemName];
         if (!id) console.warn(`Не найден ID для: ${itemName}`);
         return id;
       };
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import './ToolModal.css';
-import { getIdByName, fetchProfessions, fetchGroups } from '../../services/api';
+import { getIdByName, getIdsByNames, fetchProfessions, fetchGroups } from '../../services/api';
 
 const ToolModal = ({ tool, onClose, onEdit, loading }) => {
   const [isEditing, setIsEditing] = useState(false);
@@ -74,11 +74,18 @@ const ToolModal = ({ tool, onClose, onEdit, loading }) => {
 
   const handleSaveClick = async () => {
     try {
-      const toolId = await getIdByName(tool.tool);
+      const toolId = await getIdByName(tool.tool, 'Tool');
       if (!toolId) throw new Error(`Не удалось получить ID инструмента: ${tool.tool}`);
 
+      const ids = await getIdsByNames([
+        editedData.group,
+        tool.tool_group,
+        ...editedData.professions,
+        ...(tool.professions || [])
+      ]);
+
       const getItemId = async (itemName) => {
-        const id = await getIdByName(itemName);
+        const id = ids[itemName];
         if (!id) console.warn(`Не найден ID для: ${itemName}`);
         return id;
       };
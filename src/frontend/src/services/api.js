@@ -1,8 +1,26 @@
 const API_BASE_URL = 'http://localhost:8000/api'; // URL
 
+// Закладка Neo4j последней записи: следующие запросы читают данные не старше нее.
+// Отправляется, пока сервер не подтвердит, что учел ее (BOOKMARK_APPLIED_HEADER)
+const BOOKMARK_HEADER = 'X-Neo4j-Bookmark';
+const BOOKMARK_APPLIED_HEADER = 'X-Neo4j-Bookmark-Applied';
+let lastBookmark = null;
+
+const apiFetch = async (url, options = {}) => {
+  const headers = new Headers(options.headers || {});
+  if (lastBookmark) headers.set(BOOKMARK_HEADER, lastBookmark);
+  const response = await fetch(url, { ...options, headers });
+  if (lastBookmark && response.headers.get(BOOKMARK_APPLIED_HEADER) === lastBookmark) {
+    lastBookmark = null;
+  }
+  const bookmark = response.headers.get(BOOKMARK_HEADER);
+  if (bookmark) lastBookmark = bookmark;
+  return response;
+};
+
 export const fetchProfessions = async () => {
   try {
-    const response = await fetch(`${API_BASE_URL}/professions`);
+    const response = await apiFetch(`${API_BASE_URL}/professions`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -13,7 +31,7 @@ export const fetchProfessions = async () => {
 
 export const fetchTools = async () => {
   try {
-    const response = await fetch(`${API_BASE_URL}/tools`);
+    const response = await apiFetch(`${API_BASE_URL}/tools`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -24,7 +42,7 @@ export const fetchTools = async () => {
 
 export const fetchTechnologies = async () => {
   try {
-    const response = await fetch(`${API_BASE_URL}/technologies`);
+    const response = await apiFetch(`${API_BASE_URL}/technologies`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -35,7 +53,7 @@ export const fetchTechnologies = async () => {
 
 export const fetchSkills = async () => {
   try {
-    const response = await fetch(`${API_BASE_URL}/skills`);
+    const response = await apiFetch(`${API_BASE_URL}/skills`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -46,7 +64,7 @@ export const fetchSkills = async () => {
 
 export const fetchGroups = async (type) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/groups/${type}`);
+    const response = await apiFetch(`${API_BASE_URL}/groups/${type}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -58,7 +76,7 @@ export const fetchGroups = async (type) => {
 
 export const fetchProfessionById = async (id) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/professions/${id}`);
+    const response = await apiFetch(`${API_BASE_URL}/professions/${id}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json(); 
   } catch (error) {
@@ -69,7 +87,7 @@ export const fetchProfessionById = async (id) => {
 
 export const fetchSkillById = async (id) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/skills/${id}`);
+    const response = await apiFetch(`${API_BASE_URL}/skills/${id}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json(); 
   } catch (error) {
@@ -80,7 +98,7 @@ export const fetchSkillById = async (id) => {
 
 export const fetchToolById = async (id) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/tools/${id}`);
+    const response = await apiFetch(`${API_BASE_URL}/tools/${id}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json(); 
   } catch (error) {
@@ -91,7 +109,7 @@ export const fetchToolById = async (id) => {
 
 export const fetchTechnologyById = async (id) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/technologies/${id}`);
+    const response = await apiFetch(`${API_BASE_URL}/technologies/${id}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json(); 
   } catch (error) {
@@ -102,7 +120,7 @@ export const fetchTechnologyById = async (id) => {
 
 export const fetchProfessionsFilteredByCategory = async (categoryId) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/professions/filter/categories/${categoryId}`);
+    const response = await apiFetch(`${API_BASE_URL}/professions/filter/categories/${categoryId}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -113,7 +131,7 @@ export const fetchProfessionsFilteredByCategory = async (categoryId) => {
 
 export const fetchProfessionsFilteredByTool = async (toolId) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/professions/filter/tools/${toolId}`);
+    const response = await apiFetch(`${API_BASE_URL}/professions/filter/tools/${toolId}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -124,7 +142,7 @@ export const fetchProfessionsFilteredByTool = async (toolId) => {
 
 export const fetchProfessionsFilteredByTechnology = async (techId) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/professions/filter/technologies/${techId}`);
+    const response = await apiFetch(`${API_BASE_URL}/professions/filter/technologies/${techId}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -136,7 +154,7 @@ export const fetchProfessionsFilteredByTechnology = async (techId) => {
 export const fetchSkillsFilteredByGroup = async (groupName) => {
   try {
     const encodedGroup = encodeURIComponent(groupName); 
-    const response = await fetch(`${API_BASE_URL}/skills/filter/skillgroups/${encodedGroup}`);
+    const response = await apiFetch(`${API_BASE_URL}/skills/filter/skillgroups/${encodedGroup}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -148,7 +166,7 @@ export const fetchSkillsFilteredByGroup = async (groupName) => {
 export const fetchToolsFilteredByGroup = async (groupName) => {
   try {
     const encodedGroup = encodeURIComponent(groupName); 
-    const response = await fetch(`${API_BASE_URL}/tools/filter/toolgroups/${encodedGroup}`);
+    const response = await apiFetch(`${API_BASE_URL}/tools/filter/toolgroups/${encodedGroup}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -160,7 +178,7 @@ export const fetchToolsFilteredByGroup = async (groupName) => {
 export const fetchTechnologiesFilteredByGroup = async (groupName) => {
   try {
     const encodedGroup = encodeURIComponent(groupName); 
-    const response = await fetch(`${API_BASE_URL}/technologies/filter/technologygroups/${encodedGroup}`);
+    const response = await apiFetch(`${API_BASE_URL}/technologies/filter/technologygroups/${encodedGroup}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -171,7 +189,7 @@ export const fetchTechnologiesFilteredByGroup = async (groupName) => {
 
 export const searchProfessions = async (searchTerm) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/professions/search/by_name/${searchTerm}`);
+    const response = await apiFetch(`${API_BASE_URL}/professions/search/by_name/${searchTerm}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -182,7 +200,7 @@ export const searchProfessions = async (searchTerm) => {
 
 export const searchSkills = async (searchTerm) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/skills/search/by_name/${searchTerm}`);
+    const response = await apiFetch(`${API_BASE_URL}/skills/search/by_name/${searchTerm}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -193,7 +211,7 @@ export const searchSkills = async (searchTerm) => {
 
 export const searchTechnologies = async (searchTerm) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/technologies/search/by_name/${searchTerm}`);
+    const response = await apiFetch(`${API_BASE_URL}/technologies/search/by_name/${searchTerm}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -204,7 +222,7 @@ export const searchTechnologies = async (searchTerm) => {
 
 export const searchTechnologiesDescription = async (searchTerm) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/technologies/search/by_description/${searchTerm}`);
+    const response = await apiFetch(`${API_BASE_URL}/technologies/search/by_description/${searchTerm}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -215,7 +233,7 @@ export const searchTechnologiesDescription = async (searchTerm) => {
 
 export const searchTools = async (searchTerm) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/tools/search/by_name/${searchTerm}`);
+    const response = await apiFetch(`${API_BASE_URL}/tools/search/by_name/${searchTerm}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -226,7 +244,7 @@ export const searchTools = async (searchTerm) => {
 
 export const searchToolsDescription = async (searchTerm) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/tools/search/by_description/${searchTerm}`);
+    const response = await apiFetch(`${API_BASE_URL}/tools/search/by_description/${searchTerm}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -237,7 +255,7 @@ export const searchToolsDescription = async (searchTerm) => {
 
 export const searchGroups = async (groupType, searchTerm) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/groups/${groupType}/search/by_name/${searchTerm}`);
+    const response = await apiFetch(`${API_BASE_URL}/groups/${groupType}/search/by_name/${searchTerm}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -248,7 +266,7 @@ export const searchGroups = async (groupType, searchTerm) => {
 
 export const searchGroupsDescription = async (groupType, searchTerm) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/groups/${groupType}/search/by_description/${searchTerm}`);
+    const response = await apiFetch(`${API_BASE_URL}/groups/${groupType}/search/by_description/${searchTerm}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
   } catch (error) {
@@ -259,7 +277,7 @@ export const searchGroupsDescription = async (groupType, searchTerm) => {
 
 export const add = async (formData) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/add`, {
+    const response = await apiFetch(`${API_BASE_URL}/add`, {
       method: 'POST',
       body: formData,
     });
@@ -272,12 +290,33 @@ export const add = async (formData) => {
   }
 };
 
-export const getIdByName = async (name) => {
+// id многих узлов одним запросом: { имя: id или null }
+export const getIdsByNames = async (names, label) => {
+  try {
+    const uniqueNames = [...new Set(names.filter(Boolean))];
+    if (!uniqueNames.length) return {};
+    const response = await apiFetch(`${API_BASE_URL}/get_ids`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ names: uniqueNames, label }),
+    });
+    if (!response.ok) throw new Error(`HTTP error ${response.status}`);
+
+    const { items } = await response.json();
+    return Object.fromEntries(uniqueNames.map(name => [name, items[name]?.id ?? null]));
+  } catch (error) {
+    console.error('Failed to get IDs:', error);
+    throw error;
+  }
+};
+
+export const getIdByName = async (name, label) => {
   try {
     const encodedName = encodeURIComponent(name);
-    const url = `${API_BASE_URL}/get_id?name=${encodedName}`;
+    // С меткой поиск идет по индексу одной метки
+    const url = `${API_BASE_URL}/get_id?name=${encodedName}` + (label ? `&label=${label}` : '');
     
-    const response = await fetch(url);
+    const response = await apiFetch(url);
     if (!response.ok) throw new Error(`HTTP error ${response.status}`);
     
     return (await response.json()).id;
@@ -294,7 +333,7 @@ export const fetchGraph = async (filter = "") => {
       throw new Error(`Invalid filter value: ${filter}. Expected one of: ${VALID_FILTERS.join(", ")}`);
     }
 
-    const response = await fetch(`${API_BASE_URL}/graph${filter}`);
+    const response = await apiFetch(`${API_BASE_URL}/graph${filter}`);
     if (!response.ok) throw new Error('Network response was not ok');
     return await response.json();
     
@@ -306,7 +345,7 @@ export const fetchGraph = async (filter = "") => {
 
 export const fetchProfessionDetails = async (name) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/professions/${name}`);
+    const response = await apiFetch(`${API_BASE_URL}/professions/${name}`);
     if (!response.ok) throw new Error('Network response was not ok');
     const data = await response.json();
     return {
@@ -324,7 +363,7 @@ export const fetchProfessionDetails = async (name) => {
 
 export const getToolDetails = async (toolName) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/tools/${toolName}`);
+    const response = await apiFetch(`${API_BASE_URL}/tools/${toolName}`);
     if (!response.ok) {
       throw new Error('Инструмент не найден');
     }
@@ -337,7 +376,7 @@ export const getToolDetails = async (toolName) => {
 
 export const getSkillDetails = async (skillName) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/skills/${skillName}`);
+    const response = await apiFetch(`${API_BASE_URL}/skills/${skillName}`);
     if (!response.ok) {
       throw new Error('Навык не найден');
     }
@@ -350,7 +389,7 @@ export const getSkillDetails = async (skillName) => {
 
 export const getTechnologyDetails = async (techName) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/technologies/${techName}`);
+    const response = await apiFetch(`${API_BASE_URL}/technologies/${techName}`);
     if (!response.ok) {
       throw new Error('Технология не найдена');
     }
@@ -363,7 +402,7 @@ export const getTechnologyDetails = async (techName) => {
 
 export const getGroupDetails = async (groupName) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/groups/name/${encodeURIComponent(groupName)}`);
+    const response = await apiFetch(`${API_BASE_URL}/groups/name/${encodeURIComponent(groupName)}`);
     if (!response.ok) {
       throw new Error('Группа не найдена');
     }
@@ -376,7 +415,7 @@ export const getGroupDetails = async (groupName) => {
 
 export const editCard = async (formData) => {
   try {
-    const response = await fetch(`${API_BASE_URL}/edit`, {
+    const response = await apiFetch(`${API_BASE_URL}/edit`, {
       method: 'PUT',
       body: formData,
     });
@@ -398,7 +437,7 @@ export const exportCatalog = async (fileName) => {
   try {
     console.log(`Starting export with filename: ${fileName}`);
     
-    const response = await fetch(`${API_BASE_URL}/export`);
+    const response = await apiFetch(`${API_BASE_URL}/export`);
 
     if (!response.ok) {
       throw new Error(`Export failed with status: ${response.status}`);
@@ -435,7 +474,7 @@ export const importCatalog = async (file) => {
     const formData = new FormData();
     formData.append('archive', file);
     
-    const response = await fetch(`${API_BASE_URL}/import`, {
+    const response = await apiFetch(`${API_BASE_URL}/import`, {
       method: 'POST',
       body: formData,
     });